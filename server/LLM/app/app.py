@@ -23,7 +23,15 @@ from typing import List, Optional, Dict, Any
 sys.path.append("../")
 from src.pipeline3.chain_run import QAGraph
 from src.pipeline3.apiManager import ApiManager
-from src.components.CreateDatabase import vectorize
+from src.components.IngestionJobs import IngestionJobQueue
+from src.components.Metrics import metrics
+from src.components.FundamentalsStore import get_fundamentals_store
+from src.components.IndustryIndex import get_industry_index
+from src.components.DataSnapshot import build_snapshots
+from src.components.ChartRenderer import STATIC_DIR, get_chart_renderer
+from src.pipeline3.compiler.task_priority import get_tool_latencies
+from src.components.retrievers.EmbeddingCache import get_embedding_cache
+from src.components.retrievers.ElasticsearchClient import get_elasticsearch_client, close_elasticsearch_client
 
 # Create a FastAPI instance
 app = FastAPI()
@@ -35,6 +43,8 @@ active_connections: Dict[str, WebSocket] = {}
 class ConnectionManager:
     def __init__(self):
         self.connections: Dict[str, WebSocket] = {}
+        # Queries running per websocket, cancelled when that websocket closes
+        self.queries: Dict[WebSocket, set] = {}
 
     def setClientId(self, client_id: str):
         self.client_id = client_id
@@ -43,21 +53,137 @@ class ConnectionManager:
         await websocket.accept()
         self.connections[client_id] = websocket
 
-    def disconnect(self, client_id: str):
-        if client_id in self.connections:
-            del self.connections[client_id]
+    def disconnect(self, client_id: str, websocket: WebSocket):
+        queries = self.queries.pop(websocket, set())
+        # A stale socket closing after the client reconnected leaves the client alone
+        if self.connections.get(client_id) is not websocket:
+            return
+        del self.connections[client_id]
+        for query in queries:
+            query.cancel()
+
+    def track_query(self, client_id: str, query: asyncio.Task):
+        """Cancel `query` if the client's current websocket closes before it finishes."""
+        websocket = self.connections.get(client_id)
+        if websocket is None:
+            return
+        self.queries.setdefault(websocket, set()).add(query)
+
+        def untrack(_):
+            queries = self.queries.get(websocket)
+            if queries is not None:
+                queries.discard(query)
+                if not queries:
+                    del self.queries[websocket]
+
+        query.add_done_callback(untrack)
 
     async def send_message(self, message: str):
         websocket = self.connections.get(self.client_id)
         if websocket:
             await websocket.send_text(message)
 
+    async def send_to(self, client_id: str, message: str):
+        websocket = self.connections.get(client_id)
+        if websocket:
+            await websocket.send_text(message)
+
     async def broadcast(self, message: str):
         for websocket in self.connections.values():
             await websocket.send_text(message)
 
 manager = ConnectionManager()
 
+
+async def wait_for_disconnect(request: Request):
+    """Return once the HTTP client has gone away."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_query(request: Request, client_id: str, coroutine):
+    """
+    Run a query until it finishes, the HTTP request is aborted or the websocket
+    the client had open when the query started closes; in the latter two cases the
+    query and its pending tasks are cancelled and a 499 is raised.
+    """
+    query = asyncio.create_task(coroutine)
+    manager.track_query(client_id, query)
+    disconnect = asyncio.create_task(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({query, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+    if not query.done():
+        query.cancel()
+    try:
+        return await query
+    except asyncio.CancelledError:
+        print(f"Query of {client_id} cancelled: the client disconnected")
+        raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+async def report_ingestion_progress(job: Dict[str, Any]):
+    """Streams ingestion job state to the job owner's websocket."""
+    await manager.send_to(job["user_id"], json.dumps({"type": "ingestion", **job}))
+
+
+ingestion_jobs = IngestionJobQueue(
+    max_workers=int(os.environ.get("INGESTION_MAX_WORKERS", 2)),
+    max_jobs_per_user=int(os.environ.get("INGESTION_MAX_JOBS_PER_USER", 1)),
+    on_progress=report_ingestion_progress,
+)
+
+
+@app.on_event("startup")
+async def start_elasticsearch_client():
+    get_elasticsearch_client()
+
+
+@app.on_event("startup")
+async def compile_fundamentals():
+    # Rebuilds the columnar store if a fundamentals CSV changed since the last run
+    await asyncio.to_thread(get_fundamentals_store)
+
+
+@app.on_event("startup")
+async def build_industry_index():
+    await asyncio.to_thread(get_industry_index)
+
+
+@app.on_event("startup")
+async def build_data_snapshots():
+    # Parses only the workbooks that changed since their snapshot was taken
+    await asyncio.to_thread(build_snapshots)
+
+
+@app.on_event("startup")
+async def start_chart_renderer():
+    get_chart_renderer().start()
+
+
+@app.on_event("startup")
+async def load_tool_latencies():
+    # Past per-tool latencies from the task execution logs order the first plans' tasks
+    await asyncio.to_thread(get_tool_latencies)
+
+
+@app.on_event("shutdown")
+async def shutdown_ingestion_jobs():
+    await ingestion_jobs.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_elasticsearch_client():
+    await close_elasticsearch_client()
+
+
+@app.on_event("shutdown")
+async def shutdown_chart_renderer():
+    get_chart_renderer().shutdown()
+
 # Database setup
 DATABASE_URL = "sqlite:///./chats.db"
 FILE_DIR = Path("../data/userData/raw")
@@ -161,7 +287,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         while True:
             await websocket.receive_text()  # Keep connection alive
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
 
 # Root endpoint for health check
 @app.get("/api/v1/")
@@ -173,19 +299,33 @@ async def health():
     """
     return {"result": "Service is ready to run"}
 
-static_dir = os.path.abspath("../static")
+# Endpoint exposing process-wide performance counters
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """
+    Returns the counters and latency observations recorded by this worker.
+
+    Returns:
+        dict: Metrics snapshot plus the shared query-embedding cache statistics.
+    """
+    embedding_cache_stats = await asyncio.to_thread(get_embedding_cache().stats)
+    return {**metrics.snapshot(), "embedding_cache": embedding_cache_stats}
+
+static_dir = STATIC_DIR
 os.makedirs(static_dir, exist_ok=True)
-app.mount("/static", StaticFiles(directory="../static"), name="static")
+app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
 
 # Endpoint to process a query using the QA chain
 @app.post("/api/v1/query")
-async def process_query(request: QueryRequest):
+async def process_query(request: QueryRequest, http_request: Request):
     """
     Processes a query using the QA chain based on the user's request.
+    The query is cancelled if the client disconnects before it finishes.
 
     Args:
         request (QueryRequest): Contains the ticker, user ID, query, and chat history.
+        http_request (Request): The underlying HTTP request, watched for disconnects.
 
     Returns:
         dict: The result of the QA chain query.
@@ -201,8 +341,10 @@ async def process_query(request: QueryRequest):
             message_manager=manager,
             verbose=True,
         )
-        result = await qa_chain.run(request.query)
+        result = await run_query(http_request, request.user_id, qa_chain.run(request.query))
         return {"result": result}
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_msg = traceback.format_exc()
@@ -266,7 +408,8 @@ async def upload_files(
     userId: str = Form(...),
 ):
     """
-    Uploads and saves files for a specific user and folder, then vectorizes the files.
+    Uploads and saves files for a specific user and folder, then queues a background
+    job that vectorizes the files. Progress is streamed over the user's websocket.
 
     Args:
         files (List[UploadFile]): List of files to upload.
@@ -274,7 +417,7 @@ async def upload_files(
         userId (str): User ID associated with the files.
 
     Returns:
-        dict: A success message after the files are uploaded.
+        dict: A success message and the id of the ingestion job.
     """
     os.makedirs(f"../data/userData/raw/{userId}/{folder}", exist_ok=True)
     tasks = []
@@ -284,9 +427,26 @@ async def upload_files(
         tasks.append(save_file(file, file_path))
 
     await asyncio.gather(*tasks)
-    vectorize(f"../data/userData/raw/{userId}/{folder}", api_manager)
+    job_id = ingestion_jobs.submit(userId, f"../data/userData/raw/{userId}/{folder}")
+
+    return {"message": "Files uploaded successfully", "job_id": job_id}
+
 
-    return {"message": "Files uploaded successfully"}
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Reports the state of an ingestion job.
+
+    Args:
+        job_id (str): Job id returned by the upload endpoint.
+
+    Returns:
+        dict: Job state (queued/running/completed/failed) and parse/embed progress.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @app.get("/api/v1/files")
@@ -0,0 +1,193 @@
+import os
+import json
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+from .Metrics import metrics
+
+# Directory served under /static; resolved against the working directory like the app's mount.
+STATIC_DIR = os.path.abspath(os.environ.get("STATIC_DIR", "../static"))
+CHART_DIR = os.path.join(STATIC_DIR, "charts")
+CHART_URL_PREFIX = "/static/charts"
+# Rendering processes kept warm with matplotlib imported.
+CHART_WORKERS = int(os.environ.get("CHART_WORKERS", 2))
+# Part of every chart's hash; bump it when the rendering itself changes.
+CHART_STYLE_VERSION = 1
+CHART_TYPES = ("line", "bar", "barh", "area", "scatter", "pie")
+
+
+def _warm_up():
+    """Worker initializer: pay matplotlib's import and font cache cost once per process."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _render_chart(spec: Dict[str, Any], path: str) -> str:
+    """Worker entry point: draw `spec` into a PNG at `path`."""
+    import numpy as np
+    import matplotlib.pyplot as plt
+
+    x, series = spec["x"], spec["series"]
+    fig, ax = plt.subplots(figsize=(8, 4.5), dpi=110)
+    try:
+        values = [np.array([np.nan if v is None else v for v in s["values"]], dtype=float) for s in series]
+        positions = np.arange(len(x))
+        if spec["type"] == "pie":
+            shown = ~np.isnan(values[0])
+            ax.pie(values[0][shown], labels=[str(label) for label, keep in zip(x, shown) if keep], autopct="%1.1f%%")
+            ax.axis("equal")
+        elif spec["type"] in ("bar", "barh"):
+            width = 0.8 / len(series)
+            for i, (s, v) in enumerate(zip(series, values)):
+                offset = positions - 0.4 + width * (i + 0.5)
+                if spec["type"] == "bar":
+                    ax.bar(offset, v, width, label=s["name"])
+                else:
+                    ax.barh(offset, v, width, label=s["name"])
+            if spec["type"] == "bar":
+                ax.set_xticks(positions, [str(label) for label in x])
+            else:
+                ax.set_yticks(positions, [str(label) for label in x])
+        else:
+            for s, v in zip(series, values):
+                if spec["type"] == "scatter":
+                    ax.scatter(positions, v, label=s["name"])
+                elif spec["type"] == "area":
+                    ax.fill_between(positions, np.nan_to_num(v), alpha=0.4, label=s["name"])
+                else:
+                    ax.plot(positions, v, marker="o", label=s["name"])
+            ax.set_xticks(positions, [str(label) for label in x])
+
+        ax.set_title(spec["title"])
+        if spec["type"] != "pie":
+            ax.set_xlabel(spec["x_label"] if spec["type"] != "barh" else spec["y_label"])
+            ax.set_ylabel(spec["y_label"] if spec["type"] != "barh" else spec["x_label"])
+            ax.grid(alpha=0.3)
+            if len(series) > 1 or series[0]["name"]:
+                ax.legend(fontsize="small")
+        if len(x) > 8:
+            plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        fig.tight_layout()
+        fig.savefig(f"{path}.tmp.png", format="png")
+        os.replace(f"{path}.tmp.png", path)
+    finally:
+        plt.close(fig)
+    return path
+
+
+def make_chart_spec(x: List[Any], series: List[Dict[str, Any]], chart_type: str = "line", title: str = "", x_label: str = "", y_label: str = "") -> Dict[str, Any]:
+    """
+    Normalized description of a chart; its JSON form is what a chart is addressed by.
+
+    :param x: Category labels along the x axis (slices for "pie").
+    :param series: {"name": str, "values": [float or None, one per x]} per series.
+    :param chart_type: One of `CHART_TYPES`; anything else draws a line chart.
+    """
+    if not x or not series:
+        raise ValueError("A chart needs at least one category and one series.")
+    for s in series:
+        if len(s["values"]) != len(x):
+            raise ValueError(f"Series {s['name']!r} has {len(s['values'])} values for {len(x)} categories.")
+    chart_type = chart_type.strip().lower()
+    return {
+        "type": chart_type if chart_type in CHART_TYPES else "line",
+        "title": title,
+        "x_label": x_label,
+        "y_label": y_label,
+        "x": [label if isinstance(label, (int, float)) else str(label) for label in x],
+        "series": [{"name": str(s["name"]), "values": [None if v is None else float(v) for v in s["values"]]} for s in series],
+    }
+
+
+def get_chart_key(spec: Dict[str, Any]) -> str:
+    payload = json.dumps({"style": CHART_STYLE_VERSION, **spec}, sort_keys=True, allow_nan=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ChartRenderer:
+    def __init__(self, max_workers: int = CHART_WORKERS, chart_dir: str = CHART_DIR):
+        """
+        Renders charts with matplotlib in a pool of warm worker processes.
+
+        Charts are content-addressed: a chart's file name is the hash of its spec, so
+        an identical chart is rendered once and then served from `chart_dir`, and
+        identical charts requested while one is rendering share that render.
+        `submit` returns the URL right away; `wait` blocks until the file exists.
+
+        :param max_workers: Rendering processes.
+        :param chart_dir: Directory the PNGs are written to, served under `CHART_URL_PREFIX`.
+        """
+        self.max_workers = max_workers
+        self.chart_dir = chart_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+
+    def start(self):
+        """Start the worker processes and warm them up, so the first chart renders fast."""
+        if self._executor is None:
+            os.makedirs(self.chart_dir, exist_ok=True)
+            # Spawn rather than fork: the server process runs threads and an event loop
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, initializer=_warm_up)
+            for _ in range(self.max_workers):
+                self._executor.submit(_warm_up)
+
+    def submit(self, spec: Dict[str, Any]) -> str:
+        """
+        Make sure the chart is rendered, or being rendered, and return its URL.
+        """
+        key = get_chart_key(spec)
+        path = os.path.join(self.chart_dir, f"{key}.png")
+        url = f"{CHART_URL_PREFIX}/{key}.png"
+        if key in self._pending or os.path.exists(path):
+            metrics.incr("charts.cache_hits")
+            return url
+
+        self.start()
+        metrics.incr("charts.renders")
+        try:
+            future = self._executor.submit(_render_chart, spec, path)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once
+            print("Chart rendering pool is broken, restarting it")
+            self.shutdown()
+            self.start()
+            future = self._executor.submit(_render_chart, spec, path)
+        self._pending[key] = future
+        future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return url
+
+    async def wait(self, url: str) -> bool:
+        """
+        Wait for the chart behind `url` to finish rendering.
+
+        :return: Whether the chart file exists.
+        """
+        key = os.path.splitext(os.path.basename(url))[0]
+        future = self._pending.get(key)
+        if future is not None:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"Failed to render chart {url}: {e}")
+        return os.path.exists(os.path.join(self.chart_dir, f"{key}.png"))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_chart_renderer: Optional[ChartRenderer] = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Return the process-wide chart renderer."""
+    global _chart_renderer
+    if _chart_renderer is None:
+        _chart_renderer = ChartRenderer()
+    return _chart_renderer
@@ -6,19 +6,33 @@ from src.pipeline3.apiManager import ApiManager
 from src.components.retrievers.PDFDatabaseCreator import PDFDatabaseCreator
 from src.components.retrievers.VectorDB import VectorDB
 
-def vectorize(dirPath, api_manager):
-    pdf_creator = PDFDatabaseCreator(dirPath)
-    database = pdf_creator.create_database()
-    pdf_creator.save_database_as_json(database)
+def vectorize(dirPath, api_manager, index_type="exact", incremental=True, progress_callback=None, num_workers=1):
+    """
+    Parse, chunk and embed the PDFs in `dirPath`.
 
+    Documents stream from the parser through the processed JSON-lines file into
+    the vector store one at a time, so memory does not grow with the corpus.
+    In incremental mode only new or changed files are parsed and embedded; vectors
+    of unchanged files are kept and vectors of removed files are dropped.
+    `progress_callback(stage, done, total)` is called as files are parsed ("parse")
+    and chunks are embedded ("embed"). `num_workers` > 1 parses PDFs in parallel
+    worker processes.
+    """
+    pdf_creator = PDFDatabaseCreator(dirPath, num_workers=num_workers)
+    existing_database = pdf_creator.open_existing_database() if incremental else None
+    documents = pdf_creator.save_documents(
+        pdf_creator.iter_documents(existing_database, progress_callback)
+    )
 
     vectorDbBase = dirPath.replace("/raw/", "/vectorDb/")
     os.makedirs(vectorDbBase, exist_ok=True)
-    vectorDbPath = os.path.join(vectorDbBase, f"{os.path.basename(dirPath)}.pkl")
+    vectorDbPath = os.path.join(vectorDbBase, os.path.basename(dirPath))
     
-    vectorDB = VectorDB(api_manager)
-    vectorDB.save_data(database, vectorDbPath)
-
+    vectorDB = VectorDB(api_manager, index_type=index_type)
+    if incremental:
+        vectorDB.update_data(documents, vectorDbPath, progress_callback)
+    else:
+        vectorDB.save_data(documents, vectorDbPath, progress_callback)
 
 if __name__ == "__main__":
     api_manager = ApiManager()
@@ -0,0 +1,4 @@
+import os
+
+# Root of the data folders (userData, macroData, fundamentalData, ...).
+DATA_DIR = os.environ.get("DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data")))
@@ -0,0 +1,256 @@
+import io
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+from .DataPaths import DATA_DIR
+from .Metrics import metrics
+
+# Snapshots of the Excel workbooks, one directory per workbook.
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "cache", "snapshots")
+# Layout of a snapshot; bumping it rebuilds every snapshot.
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Workbooks served through `get_dataset`, with the `pandas.read_excel` options they are parsed with.
+DATASETS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "industry_indicators": (os.path.join(DATA_DIR, "BasicIndustryIndicatorsData", "BasicIndustryIndicatorsData.xlsx"), {"na_values": ["-"], "thousands": ","}),
+    "industry_mapping": (os.path.join(DATA_DIR, "BasicIndustry2TickerData", "BasicIndustry2TickerMappingData.xlsx"), {}),
+}
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_snapshot_dir(source: str) -> str:
+    """Snapshot directory of a workbook, unique per absolute source path."""
+    source = os.path.abspath(source)
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(SNAPSHOT_DIR, f"{name}-{hashlib.sha1(source.encode()).hexdigest()[:12]}")
+
+
+def _without_sheet_metadata(source: str) -> io.BytesIO:
+    """
+    Copy of the workbook with the worksheets' auto filters removed.
+
+    openpyxl rejects some of them, e.g. a filter over "#REF!" left behind by a
+    deleted range; they don't change cell values.
+    """
+    copy = io.BytesIO()
+    with zipfile.ZipFile(source) as original, zipfile.ZipFile(copy, "w", zipfile.ZIP_DEFLATED) as stripped:
+        for item in original.infolist():
+            data = original.read(item.filename)
+            if item.filename.startswith("xl/worksheets/") and item.filename.endswith(".xml"):
+                data = re.sub(rb"<autoFilter\b[^>]*/>|<autoFilter\b.*?</autoFilter>", b"", data, flags=re.S)
+            stripped.writestr(item, data)
+    copy.seek(0)
+    return copy
+
+
+def _read_workbook(source: str, read_options: Dict[str, Any]) -> Dict[str, pd.DataFrame]:
+    """Parse every sheet of a workbook, reading only cell values if its sheet metadata doesn't parse."""
+    try:
+        return pd.read_excel(source, sheet_name=None, **read_options)
+    except ValueError as e:
+        print(f"Reading cell values only from {source}: {e}")
+        return pd.read_excel(_without_sheet_metadata(source), sheet_name=None, engine="openpyxl", **read_options)
+
+
+def _save_column(series: pd.Series, path: str) -> Dict[str, Any]:
+    """
+    Write one column as `.npy` and describe it for the schema.
+
+    Numeric, boolean and datetime columns keep their dtype; anything else is stored
+    as fixed-width unicode with a separate mask of missing values.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy()
+        np.save(path, values, allow_pickle=False)
+        return {"kind": "array", "dtype": values.dtype.str}
+
+    missing = series.isna().to_numpy()
+    np.save(path, series.astype(object).where(~missing, "").astype(str).to_numpy(dtype=str), allow_pickle=False)
+    np.save(f"{path}.mask.npy", missing, allow_pickle=False)
+    return {"kind": "string"}
+
+
+def _load_column(path: str, column: Dict[str, Any]) -> Any:
+    values = np.load(path, mmap_mode="r")
+    if column["kind"] == "array":
+        return values
+    strings = values.astype(object)
+    strings[np.load(f"{path}.mask.npy")] = None
+    return pd.array(strings, dtype="string")
+
+
+class DataSnapshot:
+    def __init__(self, source: str, read_options: Optional[Dict[str, Any]] = None):
+        """
+        Binary, columnar copy of an Excel workbook.
+
+        Every column of every sheet is stored as its own `.npy` file under a
+        directory named after the workbook's content hash and read options, next to `current.json`,
+        which records the sheets' schemas and the source's size, mtime and hash.
+        A workbook is parsed only when its snapshot is missing or its content changed:
+        an unchanged mtime and size is trusted without reading the file, and a changed
+        mtime with an unchanged hash just updates the recorded mtime. Numeric columns
+        are served from memory-mapped files.
+
+        :param source: Path of the `.xlsx` workbook.
+        :param read_options: Keyword arguments of `pandas.read_excel`; changing them rebuilds the snapshot.
+        """
+        self.source = os.path.abspath(source)
+        self.read_options = read_options or {}
+        self.snapshot_dir = get_snapshot_dir(source)
+        self.current_path = os.path.join(self.snapshot_dir, "current.json")
+
+    def _read_current(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.current_path, "r") as file:
+                current = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if current.get("format_version") != SNAPSHOT_FORMAT_VERSION or current.get("read_options") != self.read_options:
+            return None
+        return current
+
+    def _write_current(self, current: Dict[str, Any]):
+        with open(f"{self.current_path}.tmp", "w") as file:
+            json.dump(current, file)
+        os.replace(f"{self.current_path}.tmp", self.current_path)
+
+    def ensure(self) -> Dict[str, Any]:
+        """
+        Bring the snapshot in line with the workbook.
+
+        :return: The snapshot's `current.json` contents.
+        """
+        stat = os.stat(self.source)
+        current = self._read_current()
+        if current is not None and current["mtime_ns"] == stat.st_mtime_ns and current["size"] == stat.st_size:
+            return current
+
+        sha256 = _file_sha256(self.source)
+        if current is not None and current["sha256"] == sha256:
+            # Touched but not changed
+            current.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._write_current(current)
+            return current
+        return self.build(stat, sha256)
+
+    def build(self, stat: os.stat_result, sha256: str) -> Dict[str, Any]:
+        """Parse the workbook and write a new snapshot version, then drop the previous ones."""
+        start = time.monotonic()
+        sheets = _read_workbook(self.source, self.read_options)
+        version = hashlib.sha256(f"{sha256}:{json.dumps(self.read_options, sort_keys=True)}".encode()).hexdigest()[:16]
+        version_dir = os.path.join(self.snapshot_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        schemas = {}
+        for s, (sheet, frame) in enumerate(sheets.items()):
+            columns = []
+            for c, name in enumerate(frame.columns):
+                file_name = f"{s}_{c}.npy"
+                columns.append({"name": str(name), "file": file_name, **_save_column(frame[name], os.path.join(version_dir, file_name))})
+            schemas[sheet] = columns
+
+        current = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "source": self.source,
+            "read_options": self.read_options,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": sha256,
+            "version": version,
+            "sheets": schemas,
+        }
+        self._write_current(current)
+
+        # Frames of a replaced version stay readable until released: unlinked files remain mapped
+        for entry in os.listdir(self.snapshot_dir):
+            path = os.path.join(self.snapshot_dir, entry)
+            if entry != current["version"] and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+        metrics.observe("snapshots.build_latency", time.monotonic() - start)
+        print(f"Snapshot of {self.source} written to {version_dir}")
+        return current
+
+    def load(self, current: Optional[Dict[str, Any]] = None) -> Dict[str, pd.DataFrame]:
+        """Read every sheet of the snapshot as a DataFrame with the workbook's column order and dtypes."""
+        current = current or self.ensure()
+        version_dir = os.path.join(self.snapshot_dir, current["version"])
+        return {
+            sheet: pd.DataFrame({
+                column["name"]: _load_column(os.path.join(version_dir, column["file"]), column)
+                for column in columns
+            }, copy=False)
+            for sheet, columns in current["sheets"].items()
+        }
+
+
+_frames: Dict[str, Tuple[str, Dict[str, pd.DataFrame]]] = {}
+_lock = threading.Lock()
+
+
+def get_workbook(source: str, read_options: Optional[Dict[str, Any]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Return every sheet of a workbook, served from its snapshot.
+
+    Frames are kept in memory per workbook and shared by all callers, so they must
+    not be modified. The workbook's mtime is checked on every call and the frames
+    are reloaded when its snapshot changes.
+    """
+    snapshot = DataSnapshot(source, read_options)
+    with _lock:
+        current = snapshot.ensure()
+        cached = _frames.get(snapshot.source)
+        if cached is not None and cached[0] == current["version"]:
+            metrics.incr("snapshots.hits")
+            return cached[1]
+        metrics.incr("snapshots.misses")
+        frames = snapshot.load(current)
+        _frames[snapshot.source] = (current["version"], frames)
+        return frames
+
+
+def get_dataset(name: str, sheet: Optional[str] = None) -> pd.DataFrame:
+    """
+    Return a sheet of one of the `DATASETS` workbooks.
+
+    :param name: Key of `DATASETS`.
+    :param sheet: Sheet name; the first sheet by default.
+    """
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset: {name}. Expected one of {list(DATASETS)}")
+    source, read_options = DATASETS[name]
+    sheets = get_workbook(source, read_options)
+    return sheets[sheet] if sheet is not None else next(iter(sheets.values()))
+
+
+def build_snapshots():
+    """Snapshot every `DATASETS` workbook that is missing or changed; a workbook that fails to parse is skipped."""
+    for name, (source, read_options) in DATASETS.items():
+        if not os.path.exists(source):
+            continue
+        try:
+            DataSnapshot(source, read_options).ensure()
+        except Exception as e:
+            print(f"Failed to snapshot dataset {name} ({source}): {e}")
+
+
+if __name__ == "__main__":
+    # Build the snapshots ahead of time, e.g. while building the image
+    build_snapshots()
+    print(get_dataset("industry_mapping").head())
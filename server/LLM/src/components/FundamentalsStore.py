@@ -0,0 +1,246 @@
+import os
+import re
+import csv
+import time
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .DataPaths import DATA_DIR
+from .Metrics import metrics
+
+FUNDAMENTALS_DIR = os.path.join(DATA_DIR, "fundamentalData")
+# Compiled store of every fundamentals CSV.
+FUNDAMENTALS_STORE_PATH = os.path.join(DATA_DIR, "cache", "fundamentals.npz")
+# Seconds between checks of the CSV modification times.
+FUNDAMENTALS_CHECK_INTERVAL = float(os.environ.get("FUNDAMENTALS_CHECK_INTERVAL", 60))
+
+
+def normalize_item(name: str) -> str:
+    """Line item name without its unit, e.g. "roe(%)" and "roe (%)" both become "roe"."""
+    return re.sub(r"\s*\([^)]*\)", "", name).strip().lower()
+
+
+def list_fundamentals_sources(fundamentals_dir: str = FUNDAMENTALS_DIR) -> Dict[str, int]:
+    """Map each ticker to the modification time (ns) of its `<TICKER>/<TICKER>.csv`."""
+    sources = {}
+    if not os.path.isdir(fundamentals_dir):
+        return sources
+    for ticker in sorted(os.listdir(fundamentals_dir)):
+        path = os.path.join(fundamentals_dir, ticker, f"{ticker}.csv")
+        if os.path.isfile(path):
+            sources[ticker] = os.stat(path).st_mtime_ns
+    return sources
+
+
+class FundamentalsStore:
+    def __init__(self, tickers: Sequence[str], items: Sequence[str], years: Sequence[int], values: np.ndarray, sections: Sequence[str], mtimes: Sequence[int]):
+        """
+        Fundamentals of every ticker in one dense float array.
+
+        `values[t, i, y]` is line item `items[i]` of ticker `tickers[t]` in fiscal year
+        `years[y]`, NaN where the ticker doesn't report it. Tickers report different
+        sets of line items (banks vs. industrials), so `items` is their union in
+        first-seen column order. Lookups index the array once for any combination of
+        tickers, items and years.
+
+        Build with `compile`, persist with `save` and open with `load`.
+
+        :param sections: Per item, the ratio section it is listed under in the CSVs
+            ("profitability ratios", ...), or "".
+        :param mtimes: Per ticker, the modification time of the CSV it was compiled from.
+        """
+        self.tickers = list(tickers)
+        self.items = list(items)
+        self.years = np.asarray(years, dtype=np.int32)
+        self.values = values
+        self.sections = list(sections)
+        self.mtimes = list(mtimes)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+
+    @classmethod
+    def compile(cls, fundamentals_dir: str = FUNDAMENTALS_DIR) -> "FundamentalsStore":
+        """Parse every `<TICKER>/<TICKER>.csv` (one row per year, one column per line item)."""
+        sources = list_fundamentals_sources(fundamentals_dir)
+        items: Dict[str, int] = {}
+        sections: List[str] = []
+        parsed = []
+        for ticker in sources:
+            with open(os.path.join(fundamentals_dir, ticker, f"{ticker}.csv"), "r", newline="") as file:
+                header, *rows = list(csv.reader(file))
+            rows = [row for row in rows if row and row[0].strip()]
+
+            columns = {}
+            section = ""
+            for col, name in enumerate(header[1:], start=1):
+                name = name.strip().lower()
+                if name.endswith(" ratios") and not any(float(row[col] or 0) for row in rows):
+                    # Blank or zero "... ratios" columns are headings of the ratios that follow
+                    section = name
+                    continue
+                # A few CSVs repeat a column; the first one wins
+                if name in columns:
+                    continue
+                if name not in items:
+                    items[name] = len(items)
+                    sections.append(section)
+                columns[name] = col
+            parsed.append(({int(float(row[0])): row for row in rows}, columns))
+
+        years = sorted({year for rows, _ in parsed for year in rows})
+        year_index = {year: i for i, year in enumerate(years)}
+        values = np.full((len(sources), len(items), len(years)), np.nan, dtype=np.float64)
+        for t, (rows, columns) in enumerate(parsed):
+            for year, row in rows.items():
+                for name, col in columns.items():
+                    if row[col].strip():
+                        values[t, items[name], year_index[year]] = float(row[col])
+
+        return cls(list(sources), list(items), years, values, sections, list(sources.values()))
+
+    def save(self, path: str = FUNDAMENTALS_STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                tickers=np.asarray(self.tickers, dtype=str),
+                items=np.asarray(self.items, dtype=str),
+                years=self.years,
+                values=self.values,
+                sections=np.asarray(self.sections, dtype=str),
+                mtimes=np.asarray(self.mtimes, dtype=np.int64),
+            )
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str = FUNDAMENTALS_STORE_PATH) -> "FundamentalsStore":
+        with np.load(path) as data:
+            return cls(
+                data["tickers"].tolist(),
+                data["items"].tolist(),
+                data["years"],
+                data["values"],
+                data["sections"].tolist(),
+                data["mtimes"].tolist(),
+            )
+
+    def is_stale(self, fundamentals_dir: str = FUNDAMENTALS_DIR) -> bool:
+        """Whether a CSV was added, removed or modified since the store was compiled."""
+        return list_fundamentals_sources(fundamentals_dir) != dict(zip(self.tickers, self.mtimes))
+
+    def resolve_items(self, text: str) -> List[str]:
+        """
+        Line items named in free text, in store order.
+
+        An item matches when its name without unit occurs in the text as whole words,
+        longer names first so "net interest margin" doesn't also select "interest";
+        naming a ratio section ("profitability ratios") selects all of its ratios.
+        Of items sharing a name, e.g. "net profit" and "net profit (crs)", only the
+        first is kept.
+        """
+        text = remaining = text.lower()
+        bases = {}
+        for item in self.items:
+            bases.setdefault(normalize_item(item), item)
+
+        matched = set()
+        for base in sorted(bases, key=len, reverse=True):
+            pattern = rf"(?<!\w){re.escape(base)}(?!\w)"
+            if re.search(pattern, remaining):
+                matched.add(bases[base])
+                remaining = re.sub(pattern, " ", remaining)
+        return [
+            item for item, section in zip(self.items, self.sections)
+            if item in matched or (section and section in text)
+        ]
+
+    def lookup(self, tickers: Iterable[str], items: Optional[Iterable[str]] = None, start_year: Optional[int] = None, end_year: Optional[int] = None) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """
+        Select a block of the store with one fancy-indexing operation.
+
+        :param tickers: Tickers to return; unknown ones are skipped.
+        :param items: Line items to return (all by default); unknown ones are skipped.
+        :param start_year: First fiscal year to return, inclusive.
+        :param end_year: Last fiscal year to return, inclusive.
+        :return: (tickers, items, years, values) with `values[t, i, y]` as in the store.
+        """
+        tickers = [ticker for ticker in tickers if ticker in self.ticker_index]
+        items = self.items if items is None else [item for item in items if item in self.item_index]
+        year_mask = np.ones(len(self.years), dtype=bool)
+        if start_year is not None:
+            year_mask &= self.years >= start_year
+        if end_year is not None:
+            year_mask &= self.years <= end_year
+        year_ids = np.flatnonzero(year_mask)
+
+        values = self.values[np.ix_(
+            [self.ticker_index[ticker] for ticker in tickers],
+            [self.item_index[item] for item in items],
+            year_ids,
+        )]
+        return tickers, items, self.years[year_ids], values
+
+
+def format_fundamentals(tickers: Sequence[str], items: Sequence[str], years: np.ndarray, values: np.ndarray) -> str:
+    """
+    Render a `FundamentalsStore.lookup` result as one markdown table per ticker, with
+    line items as rows and years as columns. Items and years without any value are
+    left out.
+    """
+    tables = []
+    for t, ticker in enumerate(tickers):
+        block = values[t]
+        rows = np.flatnonzero(~np.isnan(block).all(axis=1))
+        cols = np.flatnonzero(~np.isnan(block).all(axis=0))
+        if len(rows) == 0:
+            tables.append(f"{ticker}: no data for the requested items and years.")
+            continue
+        lines = [
+            f"{ticker}",
+            "| line item | " + " | ".join(str(year) for year in years[cols]) + " |",
+            "|---|" + "---|" * len(cols),
+        ]
+        for i in rows:
+            cells = ("-" if np.isnan(value) else f"{value:,.2f}" for value in block[i, cols])
+            lines.append(f"| {items[i]} | " + " | ".join(cells) + " |")
+        tables.append("\n".join(lines))
+    return "\n\n".join(tables)
+
+
+_store: Optional[FundamentalsStore] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    """
+    Return the process-wide fundamentals store.
+
+    The compiled store is loaded from `FUNDAMENTALS_STORE_PATH`, and recompiled and
+    saved when a CSV changed since it was built. CSV modification times are
+    re-checked at most every `FUNDAMENTALS_CHECK_INTERVAL` seconds.
+    """
+    global _store, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _store is not None and now - _checked_at < FUNDAMENTALS_CHECK_INTERVAL:
+            return _store
+        _checked_at = now
+
+        if _store is None and os.path.exists(FUNDAMENTALS_STORE_PATH):
+            _store = FundamentalsStore.load(FUNDAMENTALS_STORE_PATH)
+        if _store is None or _store.is_stale():
+            start = time.monotonic()
+            _store = FundamentalsStore.compile()
+            _store.save(FUNDAMENTALS_STORE_PATH)
+            metrics.observe("fundamentals.compile_latency", time.monotonic() - start)
+            print(f"Compiled fundamentals of {len(_store.tickers)} tickers into {FUNDAMENTALS_STORE_PATH}")
+        return _store
+
+
+if __name__ == "__main__":
+    store = get_fundamentals_store()
+    tickers, items, years, values = store.lookup(
+        ["TCS", "INFY"], store.resolve_items("net profit, roe and p/e"), start_year=2020
+    )
+    print(format_fundamentals(tickers, items, years, values))
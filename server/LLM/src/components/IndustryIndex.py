@@ -0,0 +1,203 @@
+import re
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from .DataSnapshot import get_dataset
+from .FundamentalsStore import FundamentalsStore, get_fundamentals_store
+
+# Fundamentals line items holding each industry indicator for a single company; banks use the later names.
+INDICATOR_ITEMS = {
+    "Debt to Equity": ("debt to equity ratio", "debt to equity"),
+    "Div yield": ("dividend yield (%)",),
+    "PAT margin": ("net profit margin (%)",),
+    "Operating margin": ("op profit margin (%)",),
+    "P/B Ratio": ("price to book", "price to book value"),
+    "P/E Ratio": ("p/e", "price to earnings"),
+    "ROCE": ("roce (%)",),
+    "ROE": ("roe (%)", "roe(%)"),
+}
+# Trailing words dropped from company names before matching them.
+COMPANY_SUFFIXES = frozenset({"ltd", "limited", "inc", "corp", "corporation", "co", "company", "plc"})
+
+
+def normalize_ticker(ticker: str) -> str:
+    """Ticker key ignoring case and punctuation, so "BAJAJ-AUTO" and "BajajAuto" match."""
+    return re.sub(r"\W", "", ticker).upper()
+
+
+def normalize_company(name: str) -> str:
+    """Company name key ignoring case, punctuation and legal suffixes, so "Tata Motors Ltd." and "tata motors" match."""
+    words = re.sub(r"[^\w\s]", " ", name).casefold().split()
+    while words and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_industry(industry: str) -> str:
+    """Industry key ignoring case and whitespace; the indicator sheet wraps long names over lines."""
+    return " ".join(industry.split()).casefold()
+
+
+class IndustryIndex:
+    def __init__(self, mapping: pd.DataFrame, indicators: pd.DataFrame):
+        """
+        In-memory joins over the BasicIndustry datasets.
+
+        Built from the ticker to basic industry mapping and the per-industry
+        indicator sheet, it answers ticker -> industry, industry -> peer tickers,
+        industry -> indicators and company name -> tickers with dictionary lookups.
+        Indicators are rows of one float matrix (NaN where the sheet has "-"), in
+        `indicator_names` order.
+
+        :param mapping: Sheet with "Name", "Ticker Name" and "Basic Industry" columns.
+        :param indicators: Sheet with an "Industry name" column followed by one numeric column per indicator.
+        """
+        self.ticker_names: Dict[str, str] = {}
+        self.ticker_industries: Dict[str, str] = {}
+        self.industry_tickers: Dict[str, List[str]] = {}
+        self.industry_names: Dict[str, str] = {}
+        self._ticker_keys: Dict[str, str] = {}
+        self._company_tickers: Dict[str, List[str]] = {}
+
+        # The mapping lists tickers of an industry by descending market capitalization
+        names = mapping["Name"].fillna("").astype(str)
+        tickers = mapping["Ticker Name"].fillna("").astype(str)
+        industries = mapping["Basic Industry"].fillna("").astype(str)
+        for name, ticker, industry in zip(names, tickers, industries):
+            ticker, industry = ticker.strip(), " ".join(industry.split())
+            if not ticker or not industry:
+                continue
+            key = normalize_industry(industry)
+            self.industry_names.setdefault(key, industry)
+            self.ticker_names[ticker] = " ".join(name.split()[1:]) or ticker
+            self.ticker_industries[ticker] = key
+            self.industry_tickers.setdefault(key, []).append(ticker)
+            self._ticker_keys[normalize_ticker(ticker)] = ticker
+            self._company_tickers.setdefault(normalize_company(self.ticker_names[ticker]), []).append(ticker)
+
+        self.indicator_names = [str(name).strip() for name in indicators.columns[1:]]
+        self.indicators = indicators.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        self.indicator_rows = {}
+        for i, industry in enumerate(indicators.iloc[:, 0].fillna("").astype(str)):
+            key = normalize_industry(industry)
+            self.industry_names.setdefault(key, " ".join(industry.split()))
+            self.indicator_rows[key] = i
+
+    def resolve_ticker(self, ticker: str) -> Optional[str]:
+        """
+        The ticker as listed in the mapping, matched ignoring case and punctuation,
+        or else the ticker of the company with exactly that name.
+        """
+        resolved = self._ticker_keys.get(normalize_ticker(ticker))
+        if resolved is None:
+            resolved = next(iter(self._company_tickers.get(normalize_company(ticker), [])), None)
+        return resolved
+
+    def find_tickers(self, company: str) -> List[str]:
+        """
+        Tickers of the companies named `company`, then of those whose name starts
+        with it (e.g. "Reliance"), in mapping order.
+        """
+        key = normalize_company(company)
+        if not key:
+            return []
+        tickers = list(self._company_tickers.get(key, []))
+        for name, name_tickers in self._company_tickers.items():
+            if name.startswith(key + " "):
+                tickers += name_tickers
+        return tickers
+
+    def industry_of(self, ticker: str) -> Optional[str]:
+        """Basic industry of `ticker`, or None if it isn't mapped."""
+        ticker = self.resolve_ticker(ticker)
+        return self.industry_names[self.ticker_industries[ticker]] if ticker else None
+
+    def peers(self, ticker: str, limit: Optional[int] = None) -> List[str]:
+        """Other tickers of the same basic industry, largest first."""
+        ticker = self.resolve_ticker(ticker)
+        if ticker is None:
+            return []
+        peers = [peer for peer in self.industry_tickers[self.ticker_industries[ticker]] if peer != ticker]
+        return peers if limit is None else peers[:limit]
+
+    def industry_indicators(self, industry: str) -> Dict[str, float]:
+        """Indicators of a basic industry by name, NaN where unavailable; empty if the industry has none."""
+        row = self.indicator_rows.get(normalize_industry(industry))
+        if row is None:
+            return {}
+        return dict(zip(self.indicator_names, self.indicators[row].tolist()))
+
+
+def company_indicators(ticker: str, store: FundamentalsStore) -> Dict[str, Tuple[float, int]]:
+    """
+    The company's own values of the industry indicators, from its fundamentals.
+
+    :return: Indicator name -> (latest reported value, fiscal year); indicators the
+        company doesn't report are left out.
+    """
+    store_tickers = {normalize_ticker(known): known for known in store.tickers}
+    ticker = store_tickers.get(normalize_ticker(ticker))
+    if ticker is None:
+        return {}
+    items = [item for names in INDICATOR_ITEMS.values() for item in names]
+    _, items, years, values = store.lookup([ticker], items)
+    latest = {}
+    for item, row in zip(items, values[0]):
+        reported = np.flatnonzero(~np.isnan(row))
+        if len(reported):
+            latest[item] = (float(row[reported[-1]]), int(years[reported[-1]]))
+    return {
+        indicator: next(latest[name] for name in names if name in latest)
+        for indicator, names in INDICATOR_ITEMS.items()
+        if any(name in latest for name in names)
+    }
+
+
+def compare_with_industry(ticker: str, peer_limit: Optional[int] = 10) -> Optional[Dict[str, Any]]:
+    """
+    Join a ticker with its basic industry, peers and industry indicators, and its
+    own values of those indicators where its fundamentals are available.
+
+    :return: None if the ticker isn't mapped to an industry, otherwise a dict with
+        "ticker", "name", "industry", "peers" (largest first, up to `peer_limit`),
+        "peer_count", "industry_indicators" and "company_indicators".
+    """
+    index = get_industry_index()
+    resolved = index.resolve_ticker(ticker)
+    if resolved is None:
+        return None
+    industry = index.industry_of(resolved)
+    return {
+        "ticker": resolved,
+        "name": index.ticker_names[resolved],
+        "industry": industry,
+        "peers": index.peers(resolved, peer_limit),
+        "peer_count": len(index.peers(resolved)),
+        "industry_indicators": index.industry_indicators(industry),
+        "company_indicators": company_indicators(resolved, get_fundamentals_store()),
+    }
+
+
+_industry_index: Optional[IndustryIndex] = None
+_industry_frames: Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]] = (None, None)
+_lock = threading.Lock()
+
+
+def get_industry_index() -> IndustryIndex:
+    """
+    Return the process-wide industry index, built from the workbook snapshots and
+    rebuilt when either workbook changes.
+    """
+    global _industry_index, _industry_frames
+    # Served from memory while the workbooks are unchanged, as the same frames
+    frames = (get_dataset("industry_mapping"), get_dataset("industry_indicators"))
+    with _lock:
+        if _industry_index is None or any(frame is not built for frame, built in zip(frames, _industry_frames)):
+            _industry_index = IndustryIndex(*frames)
+            _industry_frames = frames
+        return _industry_index
+
+
+if __name__ == "__main__":
+    print(compare_with_industry("bajaj auto", peer_limit=5))
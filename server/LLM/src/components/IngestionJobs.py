@@ -0,0 +1,179 @@
+import os
+import time
+import uuid
+import queue
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Finished jobs are kept this long so clients can still poll their final state.
+FINISHED_JOB_RETENTION = 3600  # seconds
+# PDF parsing processes each ingestion job may fan out to.
+PARSE_WORKERS_PER_JOB = int(os.environ.get("INGESTION_PARSE_WORKERS", 1))
+
+
+def _run_ingestion(dir_path: str, progress_queue) -> None:
+    """Worker-process entry point: vectorize `dir_path`, reporting progress through `progress_queue`."""
+    from src.pipeline3.apiManager import ApiManager
+    from src.components.CreateDatabase import vectorize
+
+    try:
+        vectorize(
+            dir_path,
+            ApiManager(),
+            progress_callback=lambda stage, done, total: progress_queue.put((stage, done, total)),
+            num_workers=PARSE_WORKERS_PER_JOB,
+        )
+    finally:
+        progress_queue.put(None)
+
+
+class IngestionJobQueue:
+    def __init__(self, max_workers: int = 2, max_jobs_per_user: int = 1, on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        """
+        Runs ingestion (PDF parsing and embedding) jobs in a pool of worker processes.
+
+        Jobs beyond the caps wait in the queue: at most `max_workers` jobs run at
+        once overall, at most `max_jobs_per_user` per user, and never two on the
+        same directory. A worker that dies (e.g. killed for memory) fails the jobs
+        running in the pool, which is then replaced for the jobs that follow.
+
+        :param max_workers: Global concurrency cap, also the process pool size.
+        :param max_jobs_per_user: Per-user concurrency cap.
+        :param on_progress: Awaited with the job state whenever it changes.
+        """
+        self.max_workers = max_workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.on_progress = on_progress
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._executor = None
+        self._manager = None
+        self._global_slots = None
+        self._user_slots: Dict[str, asyncio.Semaphore] = {}
+        self._dir_locks: Dict[str, asyncio.Lock] = {}
+        self._tasks = set()
+
+    def _start(self):
+        if self._executor is None:
+            # Spawn rather than fork: the server process runs threads and an event loop
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            self._manager = context.Manager()
+        if self._global_slots is None:
+            self._global_slots = asyncio.Semaphore(self.max_workers)
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace the pool and its manager after a worker died, unless another job already did."""
+        if self._executor is not broken:
+            return
+        print("Ingestion worker pool is broken, restarting it")
+        broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            self._manager.shutdown()
+        except Exception as e:
+            print(f"Failed to stop the ingestion progress manager: {e}")
+        self._executor = None
+        self._manager = None
+        self._start()
+
+    def _submit_job(self, dir_path: str):
+        """Start `_run_ingestion` in the pool, replacing the pool once if a worker died while it was idle."""
+        loop = asyncio.get_running_loop()
+        try:
+            progress_queue = self._manager.Queue()
+            return self._executor, progress_queue, loop.run_in_executor(self._executor, _run_ingestion, dir_path, progress_queue)
+        except BrokenProcessPool:
+            self._restart(self._executor)
+            progress_queue = self._manager.Queue()
+            return self._executor, progress_queue, loop.run_in_executor(self._executor, _run_ingestion, dir_path, progress_queue)
+
+    def submit(self, user_id: str, dir_path: str) -> str:
+        """Enqueue an ingestion job for `dir_path` and return its job id immediately."""
+        self._start()
+        self._prune_finished_jobs()
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "dir_path": dir_path,
+            "state": "queued",
+            "stage": None,
+            "done": 0,
+            "total": 0,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the current state of a job, or None if it is unknown."""
+        return self.jobs.get(job_id)
+
+    def _prune_finished_jobs(self):
+        cutoff = time.time() - FINISHED_JOB_RETENTION
+        for job_id in [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]:
+            del self.jobs[job_id]
+
+    async def _notify(self, job: Dict[str, Any]):
+        if self.on_progress:
+            try:
+                await self.on_progress(dict(job))
+            except Exception as e:
+                print(f"Failed to report progress of job {job['job_id']}: {e}")
+
+    async def _run(self, job_id: str):
+        job = self.jobs[job_id]
+        user_slots = self._user_slots.setdefault(job["user_id"], asyncio.Semaphore(self.max_jobs_per_user))
+        dir_lock = self._dir_locks.setdefault(job["dir_path"], asyncio.Lock())
+
+        async with user_slots, dir_lock, self._global_slots:
+            job["state"] = "running"
+            job["started_at"] = time.time()
+            await self._notify(job)
+
+            executor = None
+            try:
+                executor, progress_queue, future = self._submit_job(job["dir_path"])
+                while True:
+                    try:
+                        event = await asyncio.to_thread(progress_queue.get, True, 0.5)
+                    except queue.Empty:
+                        # A crashed worker never sends the end-of-job sentinel
+                        if future.done():
+                            break
+                        continue
+                    if event is None:
+                        break
+                    job["stage"], job["done"], job["total"] = event
+                    await self._notify(job)
+
+                await future
+                job["state"] = "completed"
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e) or type(e).__name__
+                print(f"Ingestion job {job_id} failed: {e!r}")
+                if isinstance(e, BrokenProcessPool) and executor is not None:
+                    self._restart(executor)
+            job["finished_at"] = time.time()
+            await self._notify(job)
+
+    async def shutdown(self):
+        """Cancel queued jobs and stop the worker processes."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+            self._manager = None
@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+
+class Metrics:
+    """
+    Process-wide counters and latency observations.
+
+    Components record into the shared `metrics` instance below; `snapshot()` is
+    served by the `/api/v1/metrics` endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._timings = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Increment counter `name` by `value`."""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        """Record one observation of a duration (or any other value) under `name`."""
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def mean(self, name: str) -> Optional[float]:
+        """Mean of the observations recorded under `name`, or None if there are none."""
+        with self._lock:
+            timing = self._timings.get(name)
+            return timing["total"] / timing["count"] if timing else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = {
+                name: {**timing, "mean": timing["total"] / timing["count"]}
+                for name, timing in self._timings.items()
+            }
+            return {"counters": dict(self._counters), "timings": timings}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -1,11 +1,15 @@
-from .ElasticsearchBM25 import ElasticsearchBM25
+from .LocalBM25 import LocalBM25
 from .VectorDB import VectorDB
-from typing import List, Dict, Any
+from .RankFusion import FUSION_STRATEGIES, fuse
+from .ResultCache import get_result_cache
+from .EmbeddingCache import normalize_text
+from typing import List, Dict, Any, Optional
 import os
+import copy
 import asyncio
 
 class CombinedVectorBM25:
-    def __init__(self, api_manager=None, threshold=0.8, k=5, semantic_weight: float = 0.8):
+    def __init__(self, api_manager=None, threshold=0.8, k=5, semantic_weight: float = 0.8, fusion: str = "weighted_reciprocal", bm25_backend: str = "local"):
         """
         Combines VectorDB and ElasticsearchBM25 for hybrid search.
         
@@ -14,24 +18,51 @@ class CombinedVectorBM25:
             threshold (float): Similarity threshold for vector search.
             k (int): Number of results to retrieve from each method.
             semantic_weight (float): Weight for semantic search results.
+            fusion (str): Default rank-fusion strategy, one of `FUSION_STRATEGIES`.
+            bm25_backend (str): "local" for the in-process `LocalBM25` index persisted
+                with the vector store, "elasticsearch" for `ElasticsearchBM25`.
         """
+        if fusion not in FUSION_STRATEGIES:
+            raise ValueError(f"Unknown fusion strategy: {fusion}")
+        if bm25_backend not in ("local", "elasticsearch"):
+            raise ValueError(f"Unknown BM25 backend: {bm25_backend}")
         self.api_manager = api_manager
         self.threshold = threshold
         self.k = k
         self.semantic_weight = semantic_weight
         self.bm25_weight = 1 - self.semantic_weight
+        self.fusion = fusion
+        self.bm25_backend = bm25_backend
         self.vectordb = VectorDB(self.api_manager, self.threshold, self.k)
-        self.bm25db = ElasticsearchBM25(self.k)
-
-    async def load_db(self, load_dir):
+        if bm25_backend == "elasticsearch":
+            # Imported lazily so local deployments don't need the Elasticsearch client
+            from .ElasticsearchBM25 import ElasticsearchBM25
+            self.bm25db = ElasticsearchBM25(self.k)
+        else:
+            self.bm25db = LocalBM25(self.k)
+
+    async def load_db(self, load_dir, user_id: Optional[str] = None, ticker: Optional[str] = None):
         """
-        Load databases for VectorDB and BM25.
-        
+        Load databases for VectorDB and BM25. Files are read in a worker thread so a
+        large store doesn't block the event loop.
+
         Args:
             load_dir (str): Directory path to load the databases from.
+            user_id (str): Owner of the data in the shared BM25 index. Defaults to the
+                folder above the ticker folder, e.g. `vectorDb/<user_id>/<ticker>/<ticker>`.
+            ticker (str): Ticker of the data in the shared BM25 index. Defaults to the
+                folder containing the store.
         """
-        self.vectordb.load_db(load_dir)
-        await self.bm25db.create_elasticsearch_bm25_index(self.vectordb, os.path.basename(os.path.dirname(load_dir)))
+        await asyncio.to_thread(self.vectordb.load_db, load_dir)
+        if self.bm25_backend == "local":
+            await asyncio.to_thread(self.bm25db.load_index, self.vectordb, load_dir)
+        else:
+            ticker_dir = os.path.dirname(os.path.abspath(load_dir))
+            await self.bm25db.create_elasticsearch_bm25_index(
+                self.vectordb,
+                user_id or os.path.basename(os.path.dirname(ticker_dir)),
+                ticker or os.path.basename(ticker_dir),
+            )
 
     async def _fetch_semantic_results(self, query: str, recall_chunks: int):
         """Fetch semantic results if semantic weight > 0."""
@@ -41,18 +72,49 @@ class CombinedVectorBM25:
         """Fetch BM25 results if BM25 weight > 0."""
         return await self.bm25db.ainvoke(query, recall_chunks=recall_chunks)
 
-    async def ainvoke(self, query: str, k: int = 20, recall_chunks: int = 150) -> List[Dict[str, Any]]:
+    async def ainvoke(self, query: str, k: int = 20, recall_chunks: int = 150, fusion: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Perform a combined search using both VectorDB and BM25.
 
+        Results are served from the process-wide result cache when the same
+        normalized query was answered with the same parameters against the same
+        version of the store. Re-ingestion writes a new store version, so cached
+        results are invalidated as soon as the store is reloaded.
+
         Args:
             query (str): Search query.
             k (int): Number of top results to return.
             recall_chunks (int): Number of chunks to recall from each method for scoring.
+            fusion (str): Rank-fusion strategy for this call, defaults to the one set at construction.
+            use_cache (bool): Set to False to bypass the result cache for this call.
 
         Returns:
             List[Dict[str, Any]]: Combined search results with scores.
         """
+        fusion = fusion or self.fusion
+        cache_key = (
+            self.vectordb.version,
+            self.bm25_backend,
+            normalize_text(query),
+            k,
+            recall_chunks,
+            self.semantic_weight,
+            self.threshold,
+            fusion,
+        )
+        if use_cache and self.vectordb.version is not None:
+            cached = get_result_cache().get(cache_key)
+            if cached is not None:
+                # Results nest the chunk dicts; callers may modify what they get
+                return copy.deepcopy(cached)
+
+        results = await self._search(query, k, recall_chunks, fusion)
+        if use_cache and self.vectordb.version is not None:
+            get_result_cache().put(cache_key, copy.deepcopy(results))
+        return results
+
+    async def _search(self, query: str, k: int, recall_chunks: int, fusion: str) -> List[Dict[str, Any]]:
+        """Run both searches and fuse their rankings."""
         semantic_results, bm25_results = [], []
         tasks = []
 
@@ -70,50 +132,31 @@ class CombinedVectorBM25:
         if self.bm25_weight > 0:
             bm25_results = results[-1]
 
-        # Prepare combined results
-        semantic_chunk_ids = [
-            (result["metadata"]["doc_id"], result["metadata"]["original_index"]) for result in semantic_results
-        ] if semantic_results else []
-
-        bm25_chunk_ids = [
-            (result["doc_id"], result["original_index"]) for result in bm25_results
-        ] if bm25_results else []
-
-        all_chunk_ids = set(semantic_chunk_ids + bm25_chunk_ids)
-        chunk_scores = {}
-
-        # Compute scores
-        for chunk_id in all_chunk_ids:
-            score = 0
-            if chunk_id in semantic_chunk_ids:
-                index = semantic_chunk_ids.index(chunk_id)
-                score += self.semantic_weight * (1 / (index + 1))
-            if chunk_id in bm25_chunk_ids:
-                index = bm25_chunk_ids.index(chunk_id)
-                score += self.bm25_weight * (1 / (index + 1))
-            chunk_scores[chunk_id] = score
-
-        # Sort combined results by score
-        sorted_chunk_ids = sorted(chunk_scores.keys(), key=lambda x: chunk_scores[x], reverse=True)
+        # Index each result list by chunk once; the first (best ranked) hit wins
+        semantic_by_id = {}
+        for result in semantic_results:
+            semantic_by_id.setdefault((result["metadata"]["doc_id"], result["metadata"]["original_index"]), result)
+        bm25_by_id = {}
+        for result in bm25_results:
+            bm25_by_id.setdefault((result["doc_id"], result["original_index"]), result)
+
+        ranking = fuse(
+            [
+                [((result["metadata"]["doc_id"], result["metadata"]["original_index"]), result["similarity"]) for result in semantic_results],
+                [((result["doc_id"], result["original_index"]), result["score"]) for result in bm25_results],
+            ],
+            [self.semantic_weight, self.bm25_weight],
+            strategy=fusion,
+            k=k,
+        )
 
         # Prepare final results
-        final_results = []
-        for chunk_id in sorted_chunk_ids[:k]:
-            # Retrieve metadata from either database
-            chunk_metadata = next(
-                (meta for meta in semantic_results if meta["metadata"]["doc_id"] == chunk_id[0] and meta["metadata"]["original_index"] == chunk_id[1]),
-                None
-            )
-            if chunk_metadata is None and bm25_results:
-                chunk_metadata = next(
-                    (meta for meta in bm25_results if meta["doc_id"] == chunk_id[0] and meta["original_index"] == chunk_id[1]),
-                    None
-                )
-            final_results.append({
-                "chunk": chunk_metadata,
-                "score": chunk_scores[chunk_id],
-                "from_semantic": chunk_id in semantic_chunk_ids,
-                "from_bm25": chunk_id in bm25_chunk_ids,
-            })
-
-        return final_results
+        return [
+            {
+                "chunk": semantic_by_id.get(chunk_id, bm25_by_id.get(chunk_id)),
+                "score": score,
+                "from_semantic": chunk_id in semantic_by_id,
+                "from_bm25": chunk_id in bm25_by_id,
+            }
+            for chunk_id, score in ranking
+        ]
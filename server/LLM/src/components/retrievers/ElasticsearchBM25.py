@@ -1,104 +1,265 @@
-from typing import List, Dict, Any
+import os
+import time
+import hashlib
+from typing import List, Dict, Any, Optional
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from .VectorDB import VectorDB
+from .ElasticsearchClient import ELASTICSEARCH_QUERY_CACHE, get_elasticsearch_client
+from ..Metrics import metrics
+
+# Alias of the BM25 index shared by every user and ticker.
+SHARED_INDEX_ALIAS = os.environ.get("ELASTICSEARCH_BM25_INDEX", "bm25-chunks")
+# Primary shards of the shared index; documents are routed to one shard per user.
+SHARED_INDEX_SHARDS = int(os.environ.get("ELASTICSEARCH_BM25_SHARDS", 1))
+# Version of the shared index mapping. Bumping it builds a fresh index behind the alias.
+INDEX_SCHEMA_VERSION = 1
+
+
+def get_content_version(documents: List[Dict[str, Any]]) -> str:
+    """Hash of the chunk ids and content hashes of `documents`, identifying an index build."""
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(f"{doc['chunk_id']}\x1f{doc['original_uuid']}\n".encode())
+    return digest.hexdigest()
+
+
+def get_version_id(user_id: str, ticker: str) -> str:
+    """Id of the document holding the current content version of a (user, ticker) scope."""
+    return f"version:{user_id}:{ticker}"
+
 
 class ElasticsearchBM25:
-    def __init__(self, k, es_host: str = "http://elasticsearch:9200"):
+    def __init__(self, k, es_host: Optional[str] = None, query_cache: bool = ELASTICSEARCH_QUERY_CACHE, index_alias: str = SHARED_INDEX_ALIAS):
+        """
+        BM25 search backed by one Elasticsearch index shared by all users and tickers.
+
+        Chunks carry `user_id`, `ticker` and `doc_id` keyword fields and are routed by
+        user, so a search touches a single shard and filters down to its scope inside
+        Elasticsearch. The cluster holds a fixed number of shards however many users
+        there are. Every scope has a version document naming its current content
+        version; searches only match chunks of that version, so a re-index becomes
+        visible all at once when the version document is switched.
+
+        :param k: Default number of chunks returned by `ainvoke`.
+        :param es_host: Connect to this host with a dedicated client instead of the
+            shared process-wide one.
+        :param query_cache: Enable the node query cache on the index, if this instance creates it.
+        :param index_alias: Alias of the shared index.
+        """
         self.k = k
-        self.es_client = AsyncElasticsearch(es_host)
-        self.current_index = None
+        self.query_cache = query_cache
+        self.index_alias = index_alias.lower()
+        self._owns_client = es_host is not None
+        self.es_client = AsyncElasticsearch(es_host) if self._owns_client else get_elasticsearch_client()
+        self.user_id = None
+        self.ticker = None
 
-    async def create_index(self, index_name: str):
-        index_name = index_name.lower()
-        index_settings = {
+    def _index_body(self) -> Dict[str, Any]:
+        return {
             "settings": {
+                "number_of_shards": SHARED_INDEX_SHARDS,
                 "analysis": {"analyzer": {"default": {"type": "english"}}},
                 "similarity": {"default": {"type": "BM25"}},
-                "index.queries.cache.enabled": False  # Disable query cache
+                "index.queries.cache.enabled": self.query_cache
             },
             "mappings": {
+                "_meta": {"schema_version": INDEX_SCHEMA_VERSION},
                 "properties": {
                     "content": {"type": "text", "analyzer": "english"},
-                    "doc_id": {"type": "keyword", "index": False},
+                    "kind": {"type": "keyword"},
+                    "user_id": {"type": "keyword"},
+                    "ticker": {"type": "keyword"},
+                    "doc_id": {"type": "keyword"},
                     "chunk_id": {"type": "keyword", "index": False},
                     "original_index": {"type": "integer", "index": False},
+                    "content_version": {"type": "keyword"},
                 }
+            },
+        }
+
+    async def _alias_targets(self, alias: str) -> List[str]:
+        """Concrete indices the alias currently points to."""
+        if not await self.es_client.indices.exists_alias(name=alias):
+            return []
+        return list((await self.es_client.indices.get_alias(name=alias)).body)
+
+    async def ensure_index(self):
+        """
+        Make the shared alias point to an index with the current schema.
+
+        A schema change creates a fresh index and swaps the alias to it atomically;
+        each scope is re-indexed into it the next time it is loaded.
+        """
+        concrete_index = f"{self.index_alias}-v{INDEX_SCHEMA_VERSION}"
+        previous = await self._alias_targets(self.index_alias)
+        if previous == [concrete_index]:
+            return
+
+        await self.es_client.options(ignore_status=400).indices.create(
+            index=concrete_index, body=self._index_body()
+        )
+        actions = [{"remove": {"index": index, "alias": self.index_alias}} for index in previous]
+        actions.append({"add": {"index": concrete_index, "alias": self.index_alias}})
+        await self.es_client.indices.update_aliases(body={"actions": actions})
+        print(f"Alias {self.index_alias} now points to {concrete_index}")
+
+        for index in previous:
+            await self.es_client.options(ignore_status=404).indices.delete(index=index)
+
+    def _scope_filter(self, user_id: str, tickers: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {"term": {"user_id": user_id}},
+            {"terms": {"ticker": tickers}},
+        ]
+
+    def _current_version_filter(self, user_id: str, tickers: List[str]) -> Dict[str, Any]:
+        """Match chunks of each ticker's current content version, looked up from its version document."""
+        return {
+            "bool": {
+                "should": [
+                    {
+                        "bool": {
+                            "filter": [
+                                {"term": {"ticker": ticker}},
+                                {"terms": {"content_version": {
+                                    "index": self.index_alias,
+                                    "id": get_version_id(user_id, ticker),
+                                    "path": "content_version",
+                                    "routing": user_id,
+                                }}},
+                            ]
+                        }
+                    }
+                    for ticker in tickers
+                ],
+                "minimum_should_match": 1,
             }
         }
 
-        if not await self.es_client.indices.exists(index=index_name):
-            await self.es_client.indices.create(index=index_name, body=index_settings)
-            print(f"Created index: {index_name}")
-        else:
-            print(f"Index already exists: {index_name}")
-        
-        self.current_index = index_name
-
-    async def load_index(self, index_name: str):
-        """Load an existing index or create a new one if it doesn't exist."""
-        index_name = index_name.lower()
-        if not await self.es_client.indices.exists(index=index_name):
-            await self.create_index(index_name)
-        else:
-            print(f"Loaded existing index: {index_name}")
-        
-        self.current_index = index_name
-
-    async def index_documents(self, documents: List[Dict[str, Any]]):
-        if not self.current_index:
-            raise ValueError("No index selected. Use `load_index` first.")
+    async def index_documents(self, documents: List[Dict[str, Any]], user_id: str, ticker: str, content_version: str):
+        """
+        Index the chunks of one (user, ticker) scope.
 
+        Documents are keyed by scope, content version and chunk id, so indexing the
+        same version again overwrites instead of duplicating while the chunks of the
+        current version stay untouched, and routed by user.
+        """
         actions = [
             {
-                "_index": self.current_index,
+                "_index": self.index_alias,
+                "_id": f"{user_id}:{ticker}:{content_version}:{doc['chunk_id']}",
+                "_routing": user_id,
                 "_source": {
+                    "kind": "chunk",
+                    "user_id": user_id,
+                    "ticker": ticker,
                     "content": doc["content"],
                     "doc_id": doc["doc_id"],
                     "chunk_id": doc["chunk_id"],
                     "original_index": doc["original_index"],
+                    "content_version": content_version,
                 },
             }
             for doc in documents
         ]
 
+        start = time.monotonic()
         success, _ = await async_bulk(self.es_client, actions)
-        await self.es_client.indices.refresh(index=self.current_index)
+        metrics.observe("elasticsearch.bulk_latency", time.monotonic() - start)
         return success
 
-    async def ainvoke(self, query: str, recall_chunks: int = None) -> List[Dict[str, Any]]:
-        if not self.current_index:
-            raise ValueError("No index selected. Use `load_index` first.")
+    async def ainvoke(self, query: str, recall_chunks: int = None, tickers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Search the loaded scope.
 
-        await self.es_client.indices.refresh(index=self.current_index)  # Force refresh before each search
+        :param tickers: Search these tickers of the same user in one request instead
+            of the loaded ticker only.
+        """
+        if self.user_id is None:
+            raise ValueError("No scope loaded. Use `create_elasticsearch_bm25_index` first.")
 
         search_body = {
             "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": ["content"],
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": query,
+                            "fields": ["content"],
+                        }
+                    },
+                    "filter": [
+                        *self._scope_filter(self.user_id, tickers or [self.ticker]),
+                        self._current_version_filter(self.user_id, tickers or [self.ticker]),
+                    ],
                 }
             },
             "size": self.k if recall_chunks is None else recall_chunks,
         }
 
-        response = await self.es_client.search(index=self.current_index, body=search_body)
+        start = time.monotonic()
+        response = await self.es_client.search(index=self.index_alias, body=search_body, routing=self.user_id)
+        metrics.incr("elasticsearch.searches")
+        metrics.observe("elasticsearch.search_latency", time.monotonic() - start)
         return [
             {
                 "doc_id": hit["_source"]["doc_id"],
                 "original_index": hit["_source"]["original_index"],
                 "content": hit["_source"]["content"],
                 "score": hit["_score"],
+                "ticker": hit["_source"]["ticker"],
             }
             for hit in response["hits"]["hits"]
         ]
 
-    async def create_elasticsearch_bm25_index(self, db: VectorDB, index_name: str):
-        """Create a BM25 index and populate it with data from VectorDB."""
-        index_name = index_name.lower()
-        await self.load_index(index_name)
-        await self.index_documents(db.metadata)
+    async def create_elasticsearch_bm25_index(self, db: VectorDB, user_id: str, ticker: str):
+        """
+        Bring the (user, ticker) scope of the shared index in line with the chunks in
+        `db` and select it for searching.
+
+        The scope's content version (a hash of the chunk ids and content hashes) is kept
+        in a version document next to its chunks. Loading unchanged data is a no-op;
+        otherwise the chunks are indexed as new documents and the index is refreshed,
+        then the version document is switched, which moves searches to the new chunks
+        at once, and only then are the chunks of older versions deleted.
+        """
+        await self.ensure_index()
+        self.user_id, self.ticker = user_id, ticker
+        content_version = get_content_version(db.metadata)
+        version_id = get_version_id(user_id, ticker)
+
+        version_doc = await self.es_client.options(ignore_status=404).get(
+            index=self.index_alias, id=version_id, routing=user_id
+        )
+        if version_doc.body.get("found") and version_doc["_source"]["content_version"] == content_version:
+            print(f"BM25 index is up to date for {user_id}/{ticker}")
+            return
+
+        await self.index_documents(db.metadata, user_id, ticker, content_version)
+        # The one refresh per ingestion: the new chunks become searchable, though not yet matched
+        await self.es_client.indices.refresh(index=self.index_alias)
+        # The commit point: searches look the version up in real time and switch to the new chunks
+        await self.es_client.index(
+            index=self.index_alias,
+            id=version_id,
+            routing=user_id,
+            document={"kind": "version", "user_id": user_id, "ticker": ticker, "content_version": content_version},
+        )
+        await self.es_client.delete_by_query(
+            index=self.index_alias,
+            routing=user_id,
+            body={
+                "query": {
+                    "bool": {
+                        "filter": [*self._scope_filter(user_id, [ticker]), {"term": {"kind": "chunk"}}],
+                        "must_not": {"term": {"content_version": content_version}},
+                    }
+                }
+            },
+        )
+        print(f"Indexed {len(db.metadata)} chunks for {user_id}/{ticker}")
 
     async def close(self):
-        """Close the Elasticsearch client connection."""
-        await self.es_client.close()
\ No newline at end of file
+        """Close the Elasticsearch client connection, unless it is the shared one."""
+        if self._owns_client:
+            await self.es_client.close()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import os
+
+ELASTICSEARCH_HOST = os.environ.get("ELASTICSEARCH_HOST", "http://elasticsearch:9200")
+# Pooled HTTP connections per Elasticsearch node, shared by every search in the process.
+ELASTICSEARCH_CONNECTIONS = int(os.environ.get("ELASTICSEARCH_CONNECTIONS", 10))
+# Whether BM25 indices enable the node query cache.
+ELASTICSEARCH_QUERY_CACHE = os.environ.get("ELASTICSEARCH_QUERY_CACHE", "true").lower() == "true"
+
+_client = None
+
+
+def get_elasticsearch_client():
+    """
+    Return the process-wide `AsyncElasticsearch` client.
+
+    The client keeps a connection pool, so every `ElasticsearchBM25` shares its
+    connections instead of opening its own. It is closed by `close_elasticsearch_client`
+    on application shutdown.
+    """
+    global _client
+    if _client is None:
+        # Imported lazily so deployments using the local BM25 backend don't need it
+        from elasticsearch import AsyncElasticsearch
+        _client = AsyncElasticsearch(ELASTICSEARCH_HOST, connections_per_node=ELASTICSEARCH_CONNECTIONS)
+    return _client
+
+
+async def close_elasticsearch_client():
+    """Close the process-wide client, if it was ever created."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
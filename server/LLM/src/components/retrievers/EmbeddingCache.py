@@ -0,0 +1,131 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+from ..Metrics import metrics
+
+DEFAULT_CACHE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../../../data/cache/embeddings.sqlite")
+)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a text for cache lookups: collapse whitespace. Case is kept, embeddings depend on it."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 200000, ttl: float = 30 * 24 * 3600, evict_every: int = 256):
+        """
+        Persistent embedding cache shared by every worker process through SQLite.
+
+        Entries are keyed by (model, input_type, normalized text), expire after `ttl`
+        seconds and the least recently used ones are evicted beyond `max_entries`.
+
+        :param path: SQLite database file.
+        :param max_entries: Size cap of the cache.
+        :param ttl: Seconds an entry stays valid after it was written.
+        :param evict_every: Run eviction after this many writes.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self._writes_since_eviction = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+
+    @staticmethod
+    def _key(model: str, input_type: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x1f{input_type}\x1f{normalize_text(text)}".encode()).hexdigest()
+
+    def get_many(self, model: str, input_type: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Return the cached embeddings of `texts`, keyed by text. Misses are left out."""
+        # Texts that differ only in whitespace share a key
+        keys: Dict[str, List[str]] = {}
+        for text in texts:
+            keys.setdefault(self._key(model, input_type, text), []).append(text)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, embedding FROM embeddings WHERE created_at >= ? AND key IN ({','.join('?' * len(keys))})",
+                [now - self.ttl, *keys],
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                )
+
+        found = {}
+        for key, blob in rows:
+            embedding = np.frombuffer(blob, dtype=np.float32).tolist()
+            for text in keys[key]:
+                found[text] = embedding
+        hits = sum(1 for text in texts if text in found)
+        metrics.incr("embedding_cache.hits", hits)
+        metrics.incr("embedding_cache.misses", len(texts) - hits)
+        return found
+
+    def put_many(self, model: str, input_type: str, embeddings: Dict[str, List[float]]):
+        """Store embeddings keyed by text."""
+        if not embeddings:
+            return
+        now = time.time()
+        rows = [
+            (self._key(model, input_type, text), np.asarray(embedding, dtype=np.float32).tobytes(), now, now)
+            for text, embedding in embeddings.items()
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._writes_since_eviction += len(rows)
+            if self._writes_since_eviction >= self.evict_every:
+                self._writes_since_eviction = 0
+                self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM embeddings WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            metrics.incr("embedding_cache.evictions", count - self.max_entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters of this process plus the current size of the shared cache."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        hits = metrics.get("embedding_cache.hits")
+        misses = metrics.get("embedding_cache.misses")
+        return {
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
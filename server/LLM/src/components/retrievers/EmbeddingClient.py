@@ -0,0 +1,123 @@
+import asyncio
+import cohere
+from typing import Dict, List, Optional, Tuple
+from .EmbeddingCache import EmbeddingCache, get_embedding_cache
+
+EMBEDDING_MODEL = "embed-multilingual-v3.0"
+# Cohere accepts at most 96 texts per embed request.
+MAX_EMBED_BATCH_SIZE = 96
+
+
+class AsyncEmbeddingClient:
+    def __init__(self, api_manager, model: str = EMBEDDING_MODEL, input_type: str = "search_query", max_batch_size: int = MAX_EMBED_BATCH_SIZE, max_delay: float = 0.005, cache: Optional[EmbeddingCache] = None):
+        """
+        Non-blocking Cohere embedding client that micro-batches concurrent requests.
+
+        Texts requested within `max_delay` seconds of each other are sent in a single
+        embed call and the vectors are fanned back out to each caller. A fresh key is
+        taken from the ApiManager for every call so key rotation and limits apply.
+        Texts found in `cache` skip the API call entirely.
+
+        :param api_manager: API manager to fetch the Cohere API key.
+        :param model: Cohere embedding model.
+        :param input_type: Cohere input type, e.g. "search_query".
+        :param max_batch_size: Flush as soon as this many distinct texts are pending.
+        :param max_delay: Seconds to wait for more texts before flushing.
+        :param cache: Persistent embedding cache consulted before calling the API.
+        """
+        self.api_manager = api_manager
+        self.model = model
+        self.input_type = input_type
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.cache = cache
+        self._clients: Dict[str, cohere.AsyncClient] = {}
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._flush_handle = None
+        self._flush_tasks = set()
+        self._loop = None
+
+    def _get_client(self) -> cohere.AsyncClient:
+        key = self.api_manager.get_key("COHERE_API_KEY")
+        if key not in self._clients:
+            self._clients[key] = cohere.AsyncClient(api_key=key)
+        return self._clients[key]
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed `texts`, sharing the underlying API call with concurrent callers."""
+        if self.cache is None:
+            return await self._embed_uncached(texts)
+
+        # SQLite lookups run off the event loop
+        found = await asyncio.to_thread(self.cache.get_many, self.model, self.input_type, texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            embedded = dict(zip(missing, await self._embed_uncached(missing)))
+            await asyncio.to_thread(self.cache.put_many, self.model, self.input_type, embedded)
+            found.update(embedded)
+        return [found[text] for text in texts]
+
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pending futures belong to a single event loop
+            self._loop = loop
+            self._pending = {}
+            self._flush_handle = None
+
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.setdefault(text, []).append(future)
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._start_flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _start_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch = list(self._pending.items())[: self.max_batch_size]
+            for text, _ in batch:
+                del self._pending[text]
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, List[asyncio.Future]]]):
+        try:
+            response = await self._get_client().embed(
+                texts=[text for text, _ in batch],
+                model=self.model,
+                input_type=self.input_type,
+            )
+        except Exception as e:
+            for _, futures in batch:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for (_, futures), embedding in zip(batch, response.embeddings):
+            for future in futures:
+                if not future.done():
+                    future.set_result(embedding)
+
+
+_embedding_clients: Dict[Tuple[int, str, str], AsyncEmbeddingClient] = {}
+
+
+def get_embedding_client(api_manager, input_type: str = "search_query", model: str = EMBEDDING_MODEL) -> AsyncEmbeddingClient:
+    """Return the process-wide embedding client, so requests from every VectorDB coalesce."""
+    key = (id(api_manager), input_type, model)
+    if key not in _embedding_clients:
+        _embedding_clients[key] = AsyncEmbeddingClient(
+            api_manager, model=model, input_type=input_type, cache=get_embedding_cache()
+        )
+    return _embedding_clients[key]
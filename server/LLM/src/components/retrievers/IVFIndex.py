@@ -0,0 +1,137 @@
+import os
+import numpy as np
+from typing import Optional, Tuple
+
+# Rows scored per matrix product while training/assigning, bounds peak memory.
+ASSIGN_BATCH_SIZE = 65536
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the `k` highest scores, best first.
+
+    Uses `argpartition` so only the selected `k` entries are sorted.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class IVFIndex:
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8, seed: int = 0):
+        """
+        Inverted-file (IVF) approximate nearest-neighbour index over a dot-product space.
+
+        Vectors are clustered with spherical k-means into `nlist` inverted lists; a query
+        only scores the vectors in the `nprobe` lists whose centroids are closest to it.
+
+        :param nlist: Number of clusters. Defaults to ~4 * sqrt(N) at build time.
+        :param nprobe: Number of lists scanned per query (recall/latency knob).
+        :param seed: Seed for centroid initialisation, keeps builds reproducible.
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        # Manifest version of the vector store the index was built over
+        self.store_version: Optional[str] = None
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.list_ids = np.empty(0, dtype=np.int64)
+
+    @property
+    def count(self) -> int:
+        return int(self.list_ids.shape[0])
+
+    def _assign(self, embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(embeddings.shape[0], dtype=np.int64)
+        for i in range(0, embeddings.shape[0], ASSIGN_BATCH_SIZE):
+            batch = np.asarray(embeddings[i : i + ASSIGN_BATCH_SIZE], dtype=np.float32)
+            assignments[i : i + ASSIGN_BATCH_SIZE] = np.argmax(batch @ centroids.T, axis=1)
+        return assignments
+
+    def build(self, embeddings: np.ndarray, n_iter: int = 10, max_train_points: int = 256):
+        """
+        Train the coarse quantizer and fill the inverted lists.
+
+        :param embeddings: (N, D) float32 matrix, may be memory-mapped.
+        :param n_iter: Number of k-means iterations.
+        :param max_train_points: Training sample size per centroid.
+        """
+        n = embeddings.shape[0]
+        if n == 0:
+            raise ValueError("Cannot build an index over an empty embedding matrix.")
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(self.seed)
+
+        train_size = min(n, nlist * max_train_points)
+        train_ids = np.sort(rng.choice(n, size=train_size, replace=False))
+        train = np.asarray(embeddings[train_ids], dtype=np.float32)
+        centroids = train[rng.choice(train_size, size=nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = self._assign(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, train)
+            counts = np.bincount(assignments, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random training points
+                sums[empty] = train[rng.choice(train_size, size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        assignments = self._assign(embeddings, centroids)
+        self.nlist = nlist
+        self.centroids = centroids.astype(np.float32)
+        self.list_ids = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignments, minlength=nlist))]
+        ).astype(np.int64)
+
+    def search(self, embeddings: np.ndarray, query: np.ndarray, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index.
+
+        :param embeddings: The matrix the index was built over.
+        :param query: (D,) query vector.
+        :param k: Number of neighbours to return.
+        :param nprobe: Overrides the index default for this call.
+        :return: (row indices into `embeddings`, scores), best first.
+        """
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probed = top_k(self.centroids @ query, nprobe)
+        candidates = np.sort(np.concatenate(
+            [self.list_ids[self.list_offsets[c] : self.list_offsets[c + 1]] for c in probed]
+        ))
+        scores = np.asarray(embeddings[candidates], dtype=np.float32) @ query
+        best = top_k(scores, k)
+        return candidates[best], scores[best]
+
+    def save(self, path: str):
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_ids=self.list_ids,
+                nprobe=np.int64(self.nprobe),
+                store_version=np.str_(self.store_version or ""),
+            )
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            index = cls(nlist=int(data["centroids"].shape[0]), nprobe=int(data["nprobe"]))
+            index.centroids = data["centroids"]
+            index.list_offsets = data["list_offsets"]
+            index.list_ids = data["list_ids"]
+            if "store_version" in data.files:
+                index.store_version = str(data["store_version"]) or None
+        return index
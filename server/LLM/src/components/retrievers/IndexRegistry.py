@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from .CombinedVectorBM25 import CombinedVectorBM25
+from .LocalBM25 import get_bm25_path
+from .VectorDB import get_data_paths, get_index_path, get_store_version
+from ..DataPaths import DATA_DIR
+from ..Metrics import metrics
+
+# Approximate memory the loaded indexes may take before the least recently used are evicted.
+INDEX_REGISTRY_MEMORY_BUDGET = int(os.environ.get("INDEX_REGISTRY_MEMORY_MB", 2048)) * 1024 * 1024
+
+
+def get_ticker_store_path(user_id: str, ticker: str) -> str:
+    """Vector store built by `vectorize` from `userData/raw/<user_id>/<ticker>`."""
+    return os.path.join(DATA_DIR, "userData", "vectorDb", user_id, ticker, ticker)
+
+
+def get_macro_store_path() -> str:
+    """Vector store built by `vectorize` from `macroData/raw/data`."""
+    return os.path.join(DATA_DIR, "macroData", "vectorDb", "data", "data")
+
+
+def estimate_index_size(retriever: CombinedVectorBM25, path: str) -> int:
+    """
+    Approximate bytes held by a loaded retriever: the embedding matrix (memory-mapped,
+    so resident once searched), the metadata and the BM25 and IVF indexes, estimated
+    from their files on disk.
+    """
+    size = int(retriever.vectordb.embeddings.nbytes)
+    for file_path in (get_data_paths(path)[1], get_bm25_path(path), get_index_path(path)):
+        if os.path.exists(file_path):
+            size += os.path.getsize(file_path)
+    return size
+
+
+class IndexRegistry:
+    def __init__(self, memory_budget: int = INDEX_REGISTRY_MEMORY_BUDGET):
+        """
+        Process-wide cache of loaded `CombinedVectorBM25` retrievers, one per store.
+
+        A store is loaded the first time it is requested and then shared by every
+        request; concurrent requests for a store that is still loading wait for the
+        same load. Before a loaded retriever is handed out, the store's committed
+        version is compared against the one it was loaded from, so re-ingested data
+        is reloaded. When the estimated size of the loaded stores exceeds
+        `memory_budget`, the least recently used ones are dropped.
+
+        :param memory_budget: Approximate bytes the loaded stores may take.
+        """
+        self.memory_budget = memory_budget
+        # key -> (retriever, store version, estimated bytes), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[CombinedVectorBM25, Optional[str], int]]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    @property
+    def memory_used(self) -> int:
+        return sum(size for _, _, size in self._entries.values())
+
+    async def get(self, path: str, api_manager=None, bm25_backend: str = "local", user_id: Optional[str] = None, ticker: Optional[str] = None) -> CombinedVectorBM25:
+        """
+        Return a loaded retriever for the store at `path`.
+
+        :param path: Vector store path, as passed to `CombinedVectorBM25.load_db`.
+        :param api_manager: API manager of the retriever, used when it is first loaded.
+        :param bm25_backend: BM25 backend of the retriever; each backend is cached separately.
+        :param user_id: Owner of the store in the shared Elasticsearch index.
+        :param ticker: Ticker of the store in the shared Elasticsearch index.
+        :raises ValueError: If there is no store at `path`.
+        """
+        key = (os.path.abspath(path), bm25_backend)
+        version = get_store_version(path)
+        entry = self._entries.get(key)
+        if entry is not None and version is not None and entry[1] == version:
+            self._entries.move_to_end(key)
+            metrics.incr("index_registry.hits")
+            return entry[0]
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            # Another request may have loaded the store while this one waited
+            version = get_store_version(path)
+            entry = self._entries.get(key)
+            if entry is not None and version is not None and entry[1] == version:
+                self._entries.move_to_end(key)
+                metrics.incr("index_registry.hits")
+                return entry[0]
+
+            metrics.incr("index_registry.misses")
+            start = time.monotonic()
+            retriever = CombinedVectorBM25(api_manager, bm25_backend=bm25_backend)
+            await retriever.load_db(path, user_id=user_id, ticker=ticker)
+            metrics.observe("index_registry.load_latency", time.monotonic() - start)
+
+            self._entries.pop(key, None)
+            self._entries[key] = (retriever, retriever.vectordb.version, estimate_index_size(retriever, path))
+            self._evict(keep=key)
+            return retriever
+
+    def _evict(self, keep: Hashable):
+        """Drop least recently used stores, except `keep`, until the budget is met."""
+        for key in list(self._entries):
+            if self.memory_used <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            del self._entries[key]
+            metrics.incr("index_registry.evictions")
+            print(f"Evicted index {key[0]} from the registry")
+
+    def invalidate(self, path: str):
+        """Drop the loaded retrievers of the store at `path`, whatever their backend."""
+        path = os.path.abspath(path)
+        for key in [key for key in self._entries if key[0] == path]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_index_registry: Optional[IndexRegistry] = None
+
+
+def get_index_registry() -> IndexRegistry:
+    """Return the process-wide index registry."""
+    global _index_registry
+    if _index_registry is None:
+        _index_registry = IndexRegistry()
+    return _index_registry
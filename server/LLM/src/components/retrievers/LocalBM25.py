@@ -0,0 +1,193 @@
+import os
+import re
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from .IVFIndex import top_k
+
+# Stop words dropped at indexing and query time, close to the Elasticsearch english analyzer.
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for if in into is it no not of on or such that the their "
+    "then there these they this to was will with".split()
+)
+
+
+def get_bm25_path(path: str) -> str:
+    """Resolve the BM25 index file stored next to a vector store."""
+    base, ext = os.path.splitext(path)
+    if ext not in (".pkl", ".npy"):
+        base = path
+    return f"{base}.bm25.npz"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stop words."""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOP_WORDS]
+
+
+class LocalBM25:
+    def __init__(self, k: int = 5, k1: float = 1.2, b: float = 0.75):
+        """
+        In-process BM25 over an inverted index held in numpy arrays.
+
+        Postings are stored CSR-style: the rows containing term `t` and their term
+        frequencies are `doc_ids[indptr[t]:indptr[t + 1]]` and `tfs[...]`. Rows are the
+        rows of the vector store the index is built alongside, so results resolve
+        against its metadata. Has the same `ainvoke` contract as `ElasticsearchBM25`.
+
+        :param k: Default number of chunks returned by `ainvoke`.
+        :param k1: BM25 term frequency saturation.
+        :param b: BM25 document length normalization.
+        """
+        self.k = k
+        self.k1 = k1
+        self.b = b
+        self._reset()
+
+    def _reset(self):
+        # Manifest version of the vector store the index was built over
+        self.store_version: Optional[str] = None
+        self.metadata: List[Dict[str, Any]] = []
+        self.vocab: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.doc_lengths = np.empty(0, dtype=np.float32)
+        self._staged = []
+
+    @property
+    def count(self) -> int:
+        return int(self.doc_lengths.shape[0])
+
+    def add_documents(self, texts: List[str]):
+        """
+        Append documents to the index; their rows follow the rows already indexed.
+        Postings are staged and merged into the index on the next search or save.
+        """
+        term_ids, rows, tfs = [], [], []
+        lengths = np.empty(len(texts), dtype=np.float32)
+        first_row = self.count + sum(len(staged[3]) for staged in self._staged)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                rows.append(first_row + i)
+                tfs.append(tf)
+        self._staged.append((
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(rows, dtype=np.int32),
+            np.asarray(tfs, dtype=np.float32),
+            lengths,
+        ))
+
+    def _compile(self):
+        """Merge staged postings into the CSR arrays."""
+        if not self._staged:
+            return
+        existing_terms = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        term_ids = np.concatenate([existing_terms] + [staged[0] for staged in self._staged])
+        doc_ids = np.concatenate([self.doc_ids] + [staged[1] for staged in self._staged])
+        tfs = np.concatenate([self.tfs] + [staged[2] for staged in self._staged])
+        self.doc_lengths = np.concatenate([self.doc_lengths] + [staged[3] for staged in self._staged])
+        self._staged = []
+
+        # A stable sort keeps every term's rows in ascending order
+        order = np.argsort(term_ids, kind="stable")
+        self.doc_ids = doc_ids[order]
+        self.tfs = tfs[order]
+        self.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)))]
+        ).astype(np.int64)
+
+    def build(self, metadata: List[Dict[str, Any]]):
+        """Index the contents of vector store metadata from scratch."""
+        self._reset()
+        self.add_documents([meta["content"] for meta in metadata])
+        self._compile()
+        self.metadata = metadata
+
+    def save(self, path: str):
+        self._compile()
+        terms = np.asarray(sorted(self.vocab, key=self.vocab.get), dtype=str)
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                terms=terms,
+                indptr=self.indptr,
+                doc_ids=self.doc_ids,
+                tfs=self.tfs,
+                doc_lengths=self.doc_lengths,
+                store_version=np.str_(self.store_version or ""),
+            )
+        os.replace(f"{path}.tmp", path)
+
+    def _load_arrays(self, path: str):
+        self._reset()
+        with np.load(path) as data:
+            self.vocab = {term: i for i, term in enumerate(data["terms"].tolist())}
+            self.indptr = data["indptr"]
+            self.doc_ids = data["doc_ids"]
+            self.tfs = data["tfs"]
+            self.doc_lengths = data["doc_lengths"]
+            if "store_version" in data.files:
+                self.store_version = str(data["store_version"]) or None
+
+    def load_index(self, db, load_dir: str):
+        """
+        Attach to the vector store `db` loaded from `load_dir`, using the persisted
+        index when it matches the store and building (and saving) it otherwise.
+        """
+        path = get_bm25_path(load_dir)
+        if os.path.exists(path):
+            self._load_arrays(path)
+            # The index is written before the manifest, so it may belong to another commit
+            if self.store_version == db.version:
+                self.metadata = db.metadata
+                return
+            print(f"Rebuilding stale BM25 index: {path}")
+        self.build(db.metadata)
+        self.store_version = db.version
+        self.save(path)
+
+    def search(self, query: str, k: int):
+        """
+        Score the query against every document containing one of its terms.
+
+        :return: (row indices, scores) of the top `k` rows, best first.
+        """
+        self._compile()
+        n = self.count
+        scores = np.zeros(n, dtype=np.float32)
+        if n == 0:
+            return np.empty(0, dtype=np.int64), scores
+        avgdl = max(float(self.doc_lengths.mean()), 1e-9)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows, tfs = self.doc_ids[start:end], self.tfs[start:end]
+            df = end - start
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / avgdl)
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        matched = np.flatnonzero(scores)
+        best = matched[top_k(scores[matched], k)]
+        return best, scores[best]
+
+    async def ainvoke(self, query: str, recall_chunks: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows, scores = self.search(query, self.k if recall_chunks is None else recall_chunks)
+        return [
+            {
+                "doc_id": self.metadata[row]["doc_id"],
+                "original_index": self.metadata[row]["original_index"],
+                "content": self.metadata[row]["content"],
+                "score": float(score),
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    async def close(self):
+        """Nothing to release; mirrors `ElasticsearchBM25.close`."""
@@ -1,12 +1,114 @@
 import os
 import json
-from typing import List, Dict
+import time
+import multiprocessing
+from collections import deque
+from typing import List, Dict, Optional, Callable, Iterable, Iterator, Tuple, Union
 import hashlib
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredAPIFileLoader
+from pypdf import PdfReader
+from langchain.text_splitter import CharacterTextSplitter, RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_community.document_loaders import UnstructuredAPIFileLoader
+
+# Page ranges a parsing process handles before it is replaced, releasing what pypdf leaked.
+MAX_TASKS_PER_WORKER = 50
+# Seconds between checks for started and timed out files while waiting on a parse.
+PARSE_POLL_INTERVAL = 0.5
+
+# Queue a parsing process reports the start of each page range on; set by `_init_parse_worker`.
+_started_queue = None
+
+
+def _load_pdf_pages(file_path: str, start: int = 0, stop: Optional[int] = None, unstructured_api_key: Optional[str] = None) -> List[str]:
+    """
+    Load a PDF (or a page range of it) and split it into page texts.
+
+    Each page is split on its own, exactly like `PyPDFLoader.load_and_split`, so the
+    texts of consecutive page ranges concatenate to the texts of the whole file.
+    Module-level so it can run in a worker process.
+
+    :param file_path: Path to the PDF file.
+    :param start: First page to load.
+    :param stop: Page to stop before (None for the last page).
+    :param unstructured_api_key: Parse the whole file with the Unstructured API instead.
+    :return: List of page texts.
+    """
+    if unstructured_api_key:
+        loader = UnstructuredAPIFileLoader(
+            file_path,
+            strategy="hi_res",
+            api_key=unstructured_api_key,
+            hi_res_model_name="chipper",
+            mode="elements"
+        )
+        return [doc.page_content for doc in loader.load_and_split()]
+
+    reader = PdfReader(file_path)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    pages = [
+        Document(page_content=reader.pages[page].extract_text(), metadata={"source": file_path, "page": page})
+        for page in range(start, stop)
+    ]
+    return [doc.page_content for doc in RecursiveCharacterTextSplitter().split_documents(pages)]
+
+
+def _init_parse_worker(started_queue):
+    """Parsing process initializer: keep the queue `_parse_page_range` reports on."""
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _parse_page_range(token: int, file_path: str, start: int, stop: Optional[int], unstructured_api_key: Optional[str]) -> List[str]:
+    """Worker entry point: report that the page range of file `token` started, then parse it."""
+    _started_queue.put((token, time.time()))
+    return _load_pdf_pages(file_path, start, stop, unstructured_api_key)
+
+
+class ProcessedDocuments:
+    def __init__(self, path: str):
+        """
+        Lazy lookup of processed document entries by file hash.
+
+        Only the byte offset of each entry in the JSON-lines file is kept in memory;
+        entries are read back one at a time when they are reused.
+
+        :param path: Processed JSON-lines file (may not exist yet).
+        """
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as file:
+            offset = 0
+            for line in file:
+                entry = json.loads(line)
+                if "file_hash" in entry:
+                    self._offsets[entry["file_hash"]] = offset
+                offset += len(line)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, file_hash: str) -> bool:
+        return file_hash in self._offsets
+
+    def get(self, file_hash: str) -> Optional[Dict]:
+        """
+        Read the entry of the file with hash `file_hash`.
+
+        :param file_hash: SHA-256 of the file's bytes.
+        :return: The document entry, or None if it was never processed.
+        """
+        offset = self._offsets.get(file_hash)
+        if offset is None:
+            return None
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return json.loads(file.readline())
+
 
 class PDFDatabaseCreator:
-    def __init__(self, dir_path: str, api_manager=None, use_unstructured: bool = False, chunk_size: int = 3500, chunk_overlap: int = 200):
+    def __init__(self, dir_path: str, api_manager=None, use_unstructured: bool = False, chunk_size: int = 3500, chunk_overlap: int = 200, num_workers: int = 1, pages_per_task: int = 40, file_timeout: float = 600):
         """
         Initialize the PDFDatabaseCreator.
         
@@ -15,12 +117,18 @@ class PDFDatabaseCreator:
         :param use_unstructured: Whether to use Unstructured API for parsing PDFs.
         :param chunk_size: Maximum size of each chunk.
         :param chunk_overlap: Overlap size between chunks.
+        :param num_workers: Number of worker processes used to parse PDFs; 1 parses sequentially.
+        :param pages_per_task: In parallel mode, PDFs longer than this are split into page ranges.
+        :param file_timeout: In parallel mode, seconds a file may take once its parsing starts.
         """
         self.dir_path = dir_path
         self.api_manager = api_manager
         self.use_unstructured = use_unstructured
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.num_workers = num_workers
+        self.pages_per_task = pages_per_task
+        self.file_timeout = file_timeout
         self.text_splitter = CharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -28,25 +136,161 @@ class PDFDatabaseCreator:
             add_start_index=True
         )
 
-    def _load_pdf(self, file_path: str):
+    def _get_unstructured_key(self) -> Optional[str]:
+        """
+        Fetch the Unstructured API key when the Unstructured loader is selected.
+
+        :return: API key, or None to parse with pypdf.
+        """
+        if self.use_unstructured and self.api_manager:
+            return self.api_manager.get_key('UNSTRUCTURED_API_KEY')
+        return None
+
+    def _load_pdf(self, file_path: str) -> List[str]:
         """
         Load and split a single PDF file into pages using the selected loader.
         
         :param file_path: Path to the PDF file.
-        :return: List of document objects.
+        :return: List of page texts.
         """
-        if self.use_unstructured and self.api_manager:
-            loader = UnstructuredAPIFileLoader(
-                file_path,
-                strategy="hi_res",
-                api_key=self.api_manager.get_key('UNSTRUCTURED_API_KEY'),
-                hi_res_model_name="chipper",
-                mode="elements"
+        return _load_pdf_pages(file_path, unstructured_api_key=self._get_unstructured_key())
+
+    def _page_ranges(self, file_path: str, unstructured_api_key: Optional[str]) -> List[Tuple[int, Optional[int]]]:
+        """
+        Split a PDF into page ranges that can be parsed independently.
+
+        :param file_path: Path to the PDF file.
+        :param unstructured_api_key: Unstructured parses whole files only.
+        :return: List of (start, stop) page ranges.
+        """
+        if unstructured_api_key:
+            return [(0, None)]
+        num_pages = len(PdfReader(file_path).pages)
+        return [
+            (start, start + self.pages_per_task)
+            for start in range(0, max(num_pages, 1), self.pages_per_task)
+        ]
+
+    def _parse_files(self, files: List[Tuple[str, str]]) -> Iterator[Tuple[str, str, Union[List[str], Exception]]]:
+        """
+        Parse files into page texts, in the order given.
+
+        :param files: List of (file name, file hash).
+        :return: Iterator of (file name, file hash, page texts or the exception raised).
+        """
+        if self.num_workers > 1:
+            yield from self._parse_files_parallel(files)
+            return
+        for file_name, file_hash in files:
+            try:
+                yield file_name, file_hash, self._load_pdf(os.path.join(self.dir_path, file_name))
+            except Exception as e:
+                yield file_name, file_hash, e
+
+    def _parse_files_parallel(self, files: List[Tuple[str, str]]) -> Iterator[Tuple[str, str, Union[List[str], Exception]]]:
+        """
+        Parse files in a process pool, fanning out across files and page ranges.
+
+        Results are yielded in input order. A file whose parse fails or exceeds
+        `file_timeout`, counted from when its first page range starts running, yields
+        its exception without affecting the other files; time spent queued behind
+        other files doesn't count. A worker that crashes (e.g. on a malformed PDF) is
+        replaced by the pool, and its file times out. When a file times out, the pool
+        is replaced so its stuck workers stop, and the unfinished page ranges of the
+        other files in flight are submitted again, their clocks reset.
+        At most `2 * num_workers` files are in flight, bounding memory use.
+
+        :param files: List of (file name, file hash).
+        :return: Iterator of (file name, file hash, page texts or the exception raised).
+        """
+        unstructured_api_key = self._get_unstructured_key()
+        context = multiprocessing.get_context("spawn")
+
+        def start_pool():
+            # Written synchronously, so a worker that crashes right after starting a range
+            # has reported it; a fresh queue per pool, as a terminated worker may hold its lock
+            started_queue = context.SimpleQueue()
+            pool = context.Pool(
+                self.num_workers,
+                initializer=_init_parse_worker,
+                initargs=(started_queue,),
+                maxtasksperchild=MAX_TASKS_PER_WORKER,
             )
-        else:
-            loader = PyPDFLoader(file_path)
-        
-        return loader.load_and_split()
+            return pool, started_queue
+
+        def submit(entry):
+            file_path = os.path.join(self.dir_path, entry["file_name"])
+            entry["results"] = [
+                result if result is not None and result.ready()
+                else pool.apply_async(_parse_page_range, (entry["token"], file_path, start, stop, unstructured_api_key))
+                for result, (start, stop) in zip(entry["results"], entry["ranges"])
+            ]
+            entry["started"] = None
+
+        def add(token, file_name, file_hash):
+            entry = {"token": token, "file_name": file_name, "file_hash": file_hash, "error": None}
+            try:
+                entry["ranges"] = self._page_ranges(os.path.join(self.dir_path, file_name), unstructured_api_key)
+            except Exception as e:
+                entry["error"] = e
+                return entry
+            entry["results"] = [None] * len(entry["ranges"])
+            submit(entry)
+            return entry
+
+        def is_done(entry):
+            return entry["error"] is not None or all(result.ready() for result in entry["results"])
+
+        def record_starts(entries):
+            by_token = {entry["token"]: entry for entry in entries}
+            while not started_queue.empty():
+                token, started = started_queue.get()
+                entry = by_token.get(token)
+                if entry is not None and entry["started"] is None:
+                    entry["started"] = started
+
+        pool, started_queue = start_pool()
+        pending = enumerate(files)
+        in_flight = deque(add(token, *file) for _, (token, file) in zip(range(2 * self.num_workers), pending))
+        try:
+            while in_flight:
+                entry = in_flight.popleft()
+                next_file = next(pending, None)
+                if next_file is not None:
+                    in_flight.append(add(next_file[0], *next_file[1]))
+
+                while not is_done(entry):
+                    entries = [entry, *in_flight]
+                    record_starts(entries)
+                    now = time.time()
+                    expired = [
+                        other for other in entries
+                        if not is_done(other) and other["started"] is not None and now - other["started"] >= self.file_timeout
+                    ]
+                    if expired:
+                        # Workers stuck on these files never return: replace them
+                        pool.terminate()
+                        pool.join()
+                        pool, started_queue = start_pool()
+                        for other in expired:
+                            other["error"] = TimeoutError(f"Parsing timed out after {self.file_timeout}s")
+                        for other in entries:
+                            if other["error"] is None:
+                                submit(other)
+                        continue
+                    next(result for result in entry["results"] if not result.ready()).wait(PARSE_POLL_INTERVAL)
+
+                file_name, file_hash = entry["file_name"], entry["file_hash"]
+                if entry["error"] is not None:
+                    yield file_name, file_hash, entry["error"]
+                    continue
+                try:
+                    yield file_name, file_hash, [page for result in entry["results"] for page in result.get()]
+                except Exception as e:
+                    yield file_name, file_hash, e
+        finally:
+            pool.terminate()
+            pool.join()
 
     def _generate_uuid(self, content: str) -> str:
         """
@@ -57,68 +301,215 @@ class PDFDatabaseCreator:
         """
         return hashlib.sha256(content.encode()).hexdigest()
 
-    def create_database(self) -> List[Dict]:
+    def _file_hash(self, file_path: str) -> str:
+        """
+        Compute the SHA-256 of a file's bytes, used to detect new or changed files without parsing them.
+
+        :param file_path: Path to the file.
+        :return: Hexadecimal digest.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _list_pdfs(self) -> List[str]:
+        """
+        List the PDF files in the directory in a deterministic order.
+
+        :return: Sorted list of PDF file names.
+        """
+        return sorted(file_name for file_name in os.listdir(self.dir_path) if file_name.endswith(".pdf"))
+
+    def _build_entry(self, file_name: str, file_hash: str, pages: List[str]) -> Dict:
+        """
+        Build the document entry for a parsed PDF.
+
+        The doc id is derived from the file hash, so it is stable across runs and
+        independent of the directory listing order. The text is kept only in the
+        chunks rather than also as a whole-document copy.
+
+        :param file_name: Name of the PDF file inside `dir_path`.
+        :param file_hash: SHA-256 of the file's bytes.
+        :param pages: Page texts of the file.
+        :return: Document entry with its chunks.
+        """
+        content = "\n\n".join(pages)
+
+        # Generate UUID for the entire document
+        doc_uuid = self._generate_uuid(content)
+        doc_id = f"doc_{file_hash[:16]}"
+
+        # Split the content into chunks
+        chunks = self.text_splitter.split_text(content)
+
+        # Create the document entry with chunks
+        return {
+            "doc_id": doc_id,
+            "original_uuid": doc_uuid,
+            "file_name": file_name,
+            "file_hash": file_hash,
+            "chunks": [
+                {
+                    "chunk_id": f"{doc_id}_chunk_{chunk_idx}",
+                    "original_index": chunk_idx,
+                    "content": chunk
+                } for chunk_idx, chunk in enumerate(chunks)
+            ]
+        }
+
+    def iter_documents(self, existing_database: Optional[Union[List[Dict], ProcessedDocuments]] = None, progress_callback: Optional[Callable[[str, int, int], None]] = None) -> Iterator[Dict]:
+        """
+        Parse the PDFs in the directory, yielding one document entry at a time.
+
+        Only the entries currently being parsed are held in memory, so the corpus
+        size does not bound what can be processed.
+
+        :param existing_database: Previously processed entries, as a list or a
+            `ProcessedDocuments` lookup. Entries whose file hash still matches a file
+            in the directory are reused instead of being parsed again.
+        :param progress_callback: Called as `progress_callback("parse", files_done, total_files)`.
+        :return: Iterator of document entries, in directory order.
+        """
+        if isinstance(existing_database, list):
+            existing_database = {
+                doc["file_hash"]: doc for doc in existing_database if "file_hash" in doc
+            }
+        seen_hashes = set()
+        reused = 0
+        parsed_count = 0
+
+        # Hash every file first to decide which ones actually need parsing
+        file_names = self._list_pdfs()
+        plan = []
+        for file_name in file_names:
+            try:
+                file_hash = self._file_hash(os.path.join(self.dir_path, file_name))
+            except Exception as e:
+                print(f"Failed to process {file_name}: {e}")
+                continue
+            if file_hash in seen_hashes:
+                print(f"Skipping {file_name}: duplicate of an already processed file")
+                continue
+            seen_hashes.add(file_hash)
+            reusable = existing_database is not None and file_hash in existing_database
+            plan.append((file_name, file_hash, reusable))
+
+        parsed = self._parse_files([(file_name, file_hash) for file_name, file_hash, reusable in plan if not reusable])
+        for i, (file_name, file_hash, reusable) in enumerate(plan):
+            if progress_callback:
+                progress_callback("parse", i, len(plan))
+            if reusable:
+                reused += 1
+                yield {**existing_database.get(file_hash), "file_name": file_name}
+                continue
+            _, _, pages = next(parsed)
+            if isinstance(pages, Exception):
+                print(f"Failed to process {file_name}: {pages}")
+                continue
+            parsed_count += 1
+            yield self._build_entry(file_name, file_hash, pages)
+
+        if progress_callback:
+            progress_callback("parse", len(plan), len(plan))
+        if existing_database is not None:
+            print(f"Reused {reused} unchanged documents, parsed {parsed_count}")
+
+    def create_database(self, existing_database: Optional[List[Dict]] = None, progress_callback: Optional[Callable[[str, int, int], None]] = None) -> List[Dict]:
         """
         Create a structured database from the PDFs in the directory.
-        
+
+        Collects `iter_documents` into a list; prefer streaming it for large directories.
+
+        :param existing_database: Previously processed database. Entries whose file hash
+            still matches a file in the directory are reused instead of being parsed again.
+        :param progress_callback: Called as `progress_callback("parse", files_done, total_files)`.
         :return: List of dictionaries representing the document chunks.
         """
-        database_list = []
-        list_dir = os.listdir(self.dir_path)
-        
-        for i, file_name in enumerate(list_dir, 1):
-            if file_name.endswith(".pdf"):
-                file_path = os.path.join(self.dir_path, file_name)
-                try:
-                    # Use _load_pdf to load the content of the PDF
-                    pages = self._load_pdf(file_path)
-                    content = "\n\n".join(page.page_content for page in pages) 
-                    
-                    # Generate UUID for the entire document
-                    doc_uuid = self._generate_uuid(content)
-                    doc_id = f"doc_{i}"
-
-                    # Split the content into chunks
-                    chunks = self.text_splitter.split_text(content)
-                   
-                    # Create the document entry with chunks
-                    doc_entry = {
-                        "doc_id": doc_id,
-                        "original_uuid": doc_uuid,
-                        "content": content,
-                        "chunks": [
-                            {
-                                "chunk_id": f"{doc_id}_chunk_{chunk_idx}",
-                                "original_index": chunk_idx,
-                                "content": chunk
-                            } for chunk_idx, chunk in enumerate(chunks)
-                        ]
-                    }
-
-                    database_list.append(doc_entry)
-
-                except Exception as e:
-                    print(f"Failed to process {file_name}: {e}")
-        
-        return database_list
+        return list(self.iter_documents(existing_database, progress_callback))
 
-    def save_database_as_json(self, database: List[Dict]):
+    def _get_json_path(self) -> str:
         """
-        Save the processed database as a JSON file in the structured path derived from `self.dir_path`.
-        
-        :param database: The processed database list.
+        Derive the processed JSON-lines path from `self.dir_path`.
+
+        :return: Path of the processed JSON-lines file.
         """
-        # Derive the base path for the processed data
         processed_base = self.dir_path.replace("/raw/", "/processed/")
+        return os.path.join(processed_base, f"{os.path.basename(self.dir_path)}.jsonl")
+
+    def _get_legacy_json_path(self) -> str:
+        """
+        Path of the single JSON document written by earlier versions.
+
+        :return: Path of the legacy processed JSON file.
+        """
+        return os.path.splitext(self._get_json_path())[0] + ".json"
+
+    def open_existing_database(self) -> Union[List[Dict], ProcessedDocuments]:
+        """
+        Open the previously processed database for this directory for reuse.
+
+        :return: A `ProcessedDocuments` lookup, or the list of entries for a legacy JSON file.
+        """
+        json_path = self._get_json_path()
+        if not os.path.exists(json_path) and os.path.exists(self._get_legacy_json_path()):
+            return self.load_database_json()
+        return ProcessedDocuments(json_path)
+
+    def load_database_json(self) -> List[Dict]:
+        """
+        Load the previously processed database for this directory, if any.
+
+        :return: The processed database list, or an empty list.
+        """
+        json_path = self._get_json_path()
+        if os.path.exists(json_path):
+            with open(json_path, "r") as json_file:
+                return [json.loads(line) for line in json_file]
+        legacy_path = self._get_legacy_json_path()
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r") as json_file:
+                return json.load(json_file)
+        return []
+
+    def save_documents(self, documents: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Write document entries to the processed JSON-lines file as they stream past.
+
+        The file is replaced only once `documents` is exhausted; if the consumer
+        stops early the previous file is left untouched.
+
+        :param documents: Document entries, e.g. from `iter_documents`.
+        :return: Iterator yielding the same entries.
+        """
+        save_path = self._get_json_path()
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        tmp_path = f"{save_path}.tmp"
+        completed = False
+        try:
+            with open(tmp_path, "w") as json_file:
+                for doc in documents:
+                    json_file.write(json.dumps(doc) + "\n")
+                    yield doc
+            os.replace(tmp_path, save_path)
+            completed = True
+            legacy_path = self._get_legacy_json_path()
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            print(f"Database saved at: {save_path}")
+        finally:
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def save_database_as_json(self, database: Iterable[Dict]):
+        """
+        Save the processed database in the structured path derived from `self.dir_path`.
         
-        # Construct the save path for the JSON file
-        os.makedirs(processed_base, exist_ok=True)
-        save_path = os.path.join(processed_base, f"{os.path.basename(self.dir_path)}.json")
-        
-        with open(save_path, "w") as json_file:
-            json.dump(database, json_file, indent=4)
-        
-        print(f"Database saved at: {save_path}")
+        :param database: The processed database entries.
+        """
+        for _ in self.save_documents(database):
+            pass
 
 
 # Usage example
@@ -0,0 +1,74 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from ..Metrics import metrics
+
+# Defaults of the process-wide retrieval result cache.
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 2048))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 900))  # seconds
+
+_MISSING = object()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl: float = RESULT_CACHE_TTL, name: str = "result_cache"):
+        """
+        In-memory LRU cache whose entries also expire after `ttl` seconds.
+
+        Keys should include the version of the data the value was computed from, so
+        entries of an older version are never hit again and simply age out.
+
+        :param max_entries: Size cap; the least recently used entry is evicted beyond it.
+        :param ttl: Seconds an entry stays valid after it was stored.
+        :param name: Prefix of the hit/miss/eviction counters in `metrics`.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] < now:
+                del self._entries[key]
+                entry = _MISSING
+            if entry is _MISSING:
+                metrics.incr(f"{self.name}.misses")
+                return default
+            self._entries.move_to_end(key)
+        metrics.incr(f"{self.name}.hits")
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.incr(f"{self.name}.evictions", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide retrieval result cache."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(name="retrieval_cache")
+    return _result_cache
@@ -1,118 +1,761 @@
 import os
+import time
+import random
 import pickle
 import json
+import uuid
+import struct
+import threading
 import numpy as np
 import cohere 
-import asyncio
-from typing import List, Dict, Any
+import httpx
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional, Callable, Iterable, Iterator
 from tqdm import tqdm
+from .IVFIndex import IVFIndex, top_k
+from .LocalBM25 import LocalBM25, get_bm25_path
+from .EmbeddingClient import EMBEDDING_MODEL, get_embedding_client
+from ..Metrics import metrics
+
+# Version of the on-disk layout written by `save_db`. Version 1 was a single
+# pickle holding the embeddings as nested Python lists.
+STORE_FORMAT_VERSION = 2
+# Below this many chunks an exhaustive scan is as fast as probing an index.
+IVF_MIN_CHUNKS = 4096
+# Chunks sent per document embedding request.
+EMBED_BATCH_SIZE = 128
+# Upper bound on the delay between two retries of a failed embedding batch.
+MAX_RETRY_DELAY = 60  # seconds
+# Rows copied per slice when carrying vectors over into a rewritten store.
+COPY_BATCH_SIZE = 4096
+# Bytes reserved for the `.npy` header by `VectorStoreWriter`, so it can be
+# rewritten in place once the final row count is known.
+NPY_HEADER_SIZE = 128
+
+
+def get_store_paths(path: str) -> Tuple[str, str, str]:
+    """
+    Resolve the files that make up a vector store.
+
+    `path` may be given with or without a `.pkl`/`.npy` extension; all files of
+    a store share the same base name.
+
+    :return: (embeddings .npy path, metadata .jsonl path, manifest .json path)
+    """
+    base, ext = os.path.splitext(path)
+    if ext not in (".pkl", ".npy"):
+        base = path
+    return f"{base}.npy", f"{base}.meta.jsonl", f"{base}.manifest.json"
+
+
+def get_index_path(path: str) -> str:
+    """Resolve the ANN index file stored next to a vector store."""
+    return os.path.splitext(get_store_paths(path)[0])[0] + ".ivf.npz"
+
+
+def get_store_version(path: str) -> Optional[str]:
+    """
+    Identify the committed state of the store at `path`, without loading it.
+
+    Every commit writes a fresh version into the manifest; manifests written before
+    versions existed fall back to their modification time.
+
+    :return: The version, or None if there is no store.
+    """
+    manifest_path = get_store_paths(path)[2]
+    try:
+        with open(manifest_path, "r") as file:
+            return _manifest_version(json.load(file), manifest_path)
+    except FileNotFoundError:
+        return None
+
+
+def _manifest_version(manifest: Dict[str, Any], manifest_path: str) -> str:
+    return manifest.get("version") or f"{os.path.abspath(manifest_path)}@{os.stat(manifest_path).st_mtime_ns}"
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(get_store_paths(path)[2], "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def get_data_paths(path: str, manifest: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """
+    Resolve the embeddings and metadata files committed by the manifest of the store
+    at `path`. Manifests that name no files (written before data files were
+    versioned, and resume stores) use the plain `get_store_paths` names.
+
+    :param manifest: The store's manifest, if already read.
+    :return: (embeddings .npy path, metadata .jsonl path)
+    """
+    embeddings_path, metadata_path, manifest_path = get_store_paths(path)
+    manifest = manifest if manifest is not None else _read_manifest(path) or {}
+    directory = os.path.dirname(manifest_path)
+    if manifest.get("embeddings"):
+        embeddings_path = os.path.join(directory, manifest["embeddings"])
+    if manifest.get("metadata"):
+        metadata_path = os.path.join(directory, manifest["metadata"])
+    return embeddings_path, metadata_path
+
+
+def get_checkpoint_path(path: str) -> str:
+    """Resolve the checkpoint of an interrupted write of a vector store."""
+    return os.path.splitext(get_store_paths(path)[0])[0] + ".checkpoint.json"
+
+
+def get_resume_path(path: str) -> str:
+    """Resolve the store holding the rows recovered from an interrupted write."""
+    return os.path.splitext(get_store_paths(path)[0])[0] + ".resume"
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an embed call may succeed when retried: rate limits, server and network errors."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def _to_matrix(embeddings: List[List[float]]) -> np.ndarray:
+    """Pack a list of embedding vectors into a contiguous float32 matrix."""
+    dim = len(embeddings[0]) if len(embeddings) else 0
+    return np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), dim)
+
+
+def _npy_header(count: int, dim: int) -> bytes:
+    """Build a fixed-size `.npy` (format 1.0) header for a (count, dim) float32 matrix."""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (count, dim)
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class VectorStoreWriter:
+    def __init__(self, path: str):
+        """
+        Append-only writer for the on-disk vector store.
+
+        Embedding rows and metadata lines are streamed to temporary files as they
+        are appended, so memory use does not grow with the store. `commit` fixes up
+        the `.npy` header, moves the files to names carrying the new version and then
+        replaces the manifest, which names them: replacing the manifest is the single
+        step that publishes the new store.
+        A `LocalBM25` index over the chunk contents is built alongside, row for row.
+
+        :param path: Store path, as accepted by `get_store_paths`.
+        """
+        self.path = path
+        self.embeddings_path, self.metadata_path, self.manifest_path = get_store_paths(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.embeddings_path)), exist_ok=True)
+        self.count = 0
+        self.dim = 0
+        self._embeddings_file = open(f"{self.embeddings_path}.tmp", "wb")
+        self._embeddings_file.write(_npy_header(0, 0))
+        self._metadata_file = open(f"{self.metadata_path}.tmp", "wb")
+        self.bm25 = LocalBM25()
+
+    def append(self, embeddings: np.ndarray, metadata_lines: List[str]):
+        """
+        Append rows to the store.
+
+        :param embeddings: (n, D) matrix of embeddings.
+        :param metadata_lines: n JSON-encoded metadata records, one per row.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype="<f4")
+        if len(embeddings) != len(metadata_lines):
+            raise ValueError("Every embedding needs exactly one metadata record.")
+        if not len(embeddings):
+            return
+        if self.count and embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension changed from {self.dim} to {embeddings.shape[1]}.")
+        self.dim = embeddings.shape[1]
+        self._embeddings_file.write(embeddings.tobytes())
+        for line in metadata_lines:
+            self._metadata_file.write((line.rstrip("\n") + "\n").encode("utf-8"))
+        self.bm25.add_documents([json.loads(line)["content"] for line in metadata_lines])
+        self.count += len(embeddings)
+
+    def checkpoint(self, checkpoint_path: str):
+        """
+        Flush the rows appended so far and record them in `checkpoint_path`, so an
+        interrupted write can be recovered with `recover_checkpoint`.
+        """
+        self._embeddings_file.flush()
+        self._metadata_file.flush()
+        checkpoint = {
+            "model": EMBEDDING_MODEL,
+            "count": self.count,
+            "dim": self.dim,
+            "embeddings_bytes": self._embeddings_file.tell(),
+            "metadata_bytes": self._metadata_file.tell(),
+        }
+        with open(f"{checkpoint_path}.tmp", "w") as file:
+            json.dump(checkpoint, file)
+        os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+
+    def finish(self) -> np.ndarray:
+        """
+        Finalize the temporary files without publishing them yet.
+
+        :return: The written matrix, memory-mapped, e.g. to build an index over it.
+        """
+        self._embeddings_file.seek(0)
+        self._embeddings_file.write(_npy_header(self.count, self.dim))
+        self._embeddings_file.close()
+        self._metadata_file.close()
+        if not self.count:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.load(f"{self.embeddings_path}.tmp", mmap_mode="r")
+
+    def commit(self, index: Optional[IVFIndex] = None):
+        """
+        Publish the store written so far, together with its ANN index if any.
+
+        The data files get names of their own, so the committed ones are never
+        overwritten: a crash before the manifest is replaced leaves the old store
+        intact. The files replaced by the previous commit are deleted; those replaced
+        now stay until the next commit, for readers that just read the old manifest.
+        """
+        if not self._embeddings_file.closed:
+            self.finish()
+        version = uuid.uuid4().hex
+        base = os.path.splitext(self.embeddings_path)[0]
+        embeddings_path, metadata_path = f"{base}.{version}.npy", f"{base}.{version}.meta.jsonl"
+        os.replace(f"{self.embeddings_path}.tmp", embeddings_path)
+        os.replace(f"{self.metadata_path}.tmp", metadata_path)
+
+        index_path = get_index_path(self.path)
+        if index is not None:
+            index.store_version = version
+            index.save(index_path)
+        elif os.path.exists(index_path):
+            os.remove(index_path)
+        self.bm25.store_version = version
+        self.bm25.save(get_bm25_path(self.path))
+
+        previous = _read_manifest(self.path)
+        manifest = {
+            "format_version": STORE_FORMAT_VERSION,
+            "version": version,
+            "model": EMBEDDING_MODEL,
+            "count": self.count,
+            "dim": self.dim,
+            "embeddings": os.path.basename(embeddings_path),
+            "metadata": os.path.basename(metadata_path),
+            "replaced": [os.path.basename(p) for p in get_data_paths(self.path, previous)] if previous else [],
+        }
+        with open(f"{self.manifest_path}.tmp", "w") as file:
+            json.dump(manifest, file)
+        os.replace(f"{self.manifest_path}.tmp", self.manifest_path)
+
+        directory = os.path.dirname(self.manifest_path)
+        for name in (previous or {}).get("replaced", []):
+            file_path = os.path.join(directory, name)
+            if name not in (manifest["embeddings"], manifest["metadata"]) and os.path.exists(file_path):
+                os.remove(file_path)
+
+    def close(self):
+        """Close the temporary files, keeping them for `recover_checkpoint`."""
+        self._embeddings_file.close()
+        self._metadata_file.close()
+
+    def abort(self):
+        """Discard everything written, leaving any existing store untouched."""
+        self.close()
+        for path in (f"{self.embeddings_path}.tmp", f"{self.metadata_path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def recover_checkpoint(path: str) -> bool:
+    """
+    Turn the temporary files of an interrupted `VectorStoreWriter` into a store at
+    `get_resume_path(path)`, truncated to the rows covered by its last checkpoint.
+
+    :return: True if a resume store is available.
+    """
+    checkpoint_path = get_checkpoint_path(path)
+    resume_path = get_resume_path(path)
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as file:
+            checkpoint = json.load(file)
+        embeddings_path, metadata_path, _ = get_store_paths(path)
+        tmp_paths = (f"{embeddings_path}.tmp", f"{metadata_path}.tmp")
+        if checkpoint.get("model") == EMBEDDING_MODEL and all(os.path.exists(p) for p in tmp_paths):
+            with open(tmp_paths[0], "r+b") as file:
+                file.truncate(checkpoint["embeddings_bytes"])
+                file.write(_npy_header(checkpoint["count"], checkpoint["dim"]))
+            with open(tmp_paths[1], "r+b") as file:
+                file.truncate(checkpoint["metadata_bytes"])
+            resume_embeddings, resume_metadata, resume_manifest = get_store_paths(resume_path)
+            os.replace(tmp_paths[0], resume_embeddings)
+            os.replace(tmp_paths[1], resume_metadata)
+            with open(resume_manifest, "w") as file:
+                json.dump({
+                    "format_version": STORE_FORMAT_VERSION,
+                    "model": EMBEDDING_MODEL,
+                    "count": checkpoint["count"],
+                    "dim": checkpoint["dim"],
+                }, file)
+            print(f"Recovered {checkpoint['count']} embedded chunks from an interrupted run.")
+        os.remove(checkpoint_path)
+    return os.path.exists(get_store_paths(resume_path)[2])
+
+
+def remove_store(path: str):
+    """Delete every file of the store at `path`."""
+    manifest = _read_manifest(path) or {}
+    directory = os.path.dirname(get_store_paths(path)[2])
+    data_paths = (*get_data_paths(path, manifest), *(os.path.join(directory, name) for name in manifest.get("replaced", [])))
+    for file_path in (*data_paths, *get_store_paths(path), get_index_path(path), get_bm25_path(path)):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
 
 class VectorDB:
-    def __init__(self, api_manager = None, threshold = 0.8, k = 5):
+    def __init__(self, api_manager = None, threshold = 0.8, k = 5, index_type: str = "exact", nlist: int = None, nprobe: int = 8, max_concurrency: int = 4, max_retries: int = 5, retry_delay: float = 1.0):
+        """
+        :param api_manager: API manager used to fetch the Cohere key.
+        :param threshold: Minimum similarity for a chunk to be returned.
+        :param k: Default number of chunks returned by `ainvoke`.
+        :param index_type: "exact" for a full scan, "ivf" to build an ANN index when saving.
+            A persisted index is always used on load; pass `exact=True` to bypass it.
+        :param nlist: Number of IVF clusters (defaults to ~4 * sqrt(N)).
+        :param nprobe: Number of IVF clusters scanned per query.
+        :param max_concurrency: Maximum number of document embedding batches in flight;
+            batches wait for a Cohere key with calls left.
+        :param max_retries: Attempts per embedding batch before the write fails; only
+            rate limits, server and network errors are retried.
+        :param retry_delay: Initial retry delay in seconds, doubled on every attempt.
+        """
+        if index_type not in ("exact", "ivf"):
+            raise ValueError(f"Unknown index type: {index_type}")
         self.api_manager = api_manager
         self.threshold = threshold
         self.k = k
-        self.client = cohere.Client(api_key=api_manager.get_key('COHERE_API_KEY'))
-        self.embeddings = []
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.index = None
+        self._clients: Dict[str, cohere.Client] = {}
+        self._clients_lock = threading.Lock()
+        self.query_embedder = get_embedding_client(api_manager)
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
         self.metadata = []
-        self.query_cache = {}
-
-    def save_data(self, dataset: List[Dict[str, Any]], save_dir: str):
-        texts_to_embed = []
-        metadata = []
-        total_chunks = sum(len(doc['chunks']) for doc in dataset)
-        
-        with tqdm(total=total_chunks, desc="Processing chunks") as pbar:
-            for doc in dataset:
-                for chunk in doc['chunks']:
-                    texts_to_embed.append(chunk['content'])
-                    metadata.append({
-                        'doc_id': doc['doc_id'],
-                        'original_uuid': doc['original_uuid'],
-                        'chunk_id': chunk['chunk_id'],
-                        'original_index': chunk['original_index'],
-                        'content': chunk['content']
-                    })
-                    pbar.update(1)
-
-        self._embed_and_store(texts_to_embed, metadata)
-        self.save_db(save_dir)
-        
-        print(f"Vector database loaded and saved. Total chunks processed: {len(texts_to_embed)}")
-
-    def _embed_and_store(self, texts: List[str], data: List[Dict[str, Any]]):
-        batch_size = 128
-        with tqdm(total=len(texts), desc="Embedding chunks") as pbar:
-            result = []
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i : i + batch_size]
-                batch_result = self.client.embed(texts=batch, model="embed-multilingual-v3.0", input_type='search_document').embeddings
-                result.extend(batch_result)
-                pbar.update(len(batch))
-        
-        self.embeddings = result
-        self.metadata = data
-
-    async def async_dot_product(self, embeddings_chunk: np.ndarray, query_embedding: np.ndarray):
-        """Compute dot product for a chunk of embeddings asynchronously."""
-        return np.dot(embeddings_chunk, query_embedding)
-
-    async def ainvoke(self, query: str,  recall_chunks: int = None) -> List[Dict[str, Any]]:
-        """Asynchronous search method."""
-        if query in self.query_cache:
-            query_embedding = self.query_cache[query]
+        self.version = None
+
+    def save_data(self, dataset: Iterable[Dict[str, Any]], save_dir: str, progress_callback: Optional[Callable[[str, int, int], None]] = None):
+        """
+        Embed every chunk of `dataset` into a new store at `save_dir`.
+
+        Documents are consumed one at a time and embeddings are appended to the
+        store as each batch returns, so memory is bounded by the batch size rather
+        than the corpus. The store is left on disk; call `load_db` to search it.
+
+        :param dataset: Document entries, e.g. streamed from `PDFDatabaseCreator.iter_documents`.
+        :param progress_callback: Called as `progress_callback("embed", chunks_done, chunks_seen)`.
+        """
+        self._write_store(dataset, save_dir, progress_callback)
+
+    def update_data(self, dataset: Iterable[Dict[str, Any]], save_dir: str, progress_callback: Optional[Callable[[str, int, int], None]] = None):
+        """
+        Incrementally bring the store at `save_dir` in line with `dataset`.
+
+        Vectors of documents that are unchanged (same doc id and content hash) are
+        copied over as they are, documents that disappeared are dropped and only new
+        or changed documents are embedded. Falls back to `save_data` when no store exists.
+        """
+        manifest_path = get_store_paths(save_dir)[2]
+        if not os.path.exists(manifest_path):
+            try:
+                # Migrates a legacy pickled store, if there is one
+                self.load_db(save_dir)
+            except ValueError:
+                return self.save_data(dataset, save_dir, progress_callback)
+        self._write_store(dataset, save_dir, progress_callback, existing=self._read_layout(save_dir))
+
+    def _read_layout(self, load_dir: str, by_chunk: bool = False) -> Dict[str, Any]:
+        """
+        Index an existing store without loading its metadata into memory.
+
+        :param by_chunk: Also map every chunk (content hash and chunk id) to its row.
+        :return: The memory-mapped embeddings, the metadata file with the byte offset
+            of every row, and for every doc id its content hash and row numbers.
+        """
+        manifest_path = get_store_paths(load_dir)[2]
+        with open(manifest_path, "r") as file:
+            manifest = json.load(file)
+        if manifest.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector database format: {manifest.get('format_version')}")
+        embeddings_path, metadata_path = get_data_paths(load_dir, manifest)
+
+        offsets = []
+        docs = {}
+        chunks = {}
+        with open(metadata_path, "rb") as file:
+            offset = 0
+            for row, line in enumerate(file):
+                meta = json.loads(line)
+                docs.setdefault(meta["doc_id"], (meta["original_uuid"], []))[1].append(row)
+                if by_chunk:
+                    chunks[f"{meta['original_uuid']}:{meta['chunk_id']}"] = row
+                offsets.append(offset)
+                offset += len(line)
+        embeddings = np.load(embeddings_path, mmap_mode="r") if offsets else np.empty((0, 0), dtype=np.float32)
+        if len(offsets) != embeddings.shape[0]:
+            raise ValueError("Vector database is corrupt: metadata and embeddings are out of sync.")
+        return {"embeddings": embeddings, "metadata_path": metadata_path, "offsets": offsets, "docs": docs, "chunks": chunks}
+
+    def _get_client(self) -> cohere.Client:
+        """
+        Return a Cohere client for the next key, so every batch counts against the key
+        limits; when every key is used up, waits for the first one to free up.
+        """
+        key = self.api_manager.get_key('COHERE_API_KEY', wait=True)
+        with self._clients_lock:
+            if key not in self._clients:
+                self._clients[key] = cohere.Client(api_key=key)
+            return self._clients[key]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of document chunks as a float32 matrix, retrying with exponential backoff."""
+        for attempt in range(self.max_retries):
+            start = time.monotonic()
+            try:
+                embeddings = self._get_client().embed(
+                    texts=texts, model=EMBEDDING_MODEL, input_type='search_document'
+                ).embeddings
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_retries - 1:
+                    raise
+                delay = min(self.retry_delay * 2 ** attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0)
+                metrics.incr("ingestion.embed_retries")
+                print(f"Embedding batch failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            metrics.observe("ingestion.embed_batch_latency", time.monotonic() - start)
+            return _to_matrix(embeddings)
+
+    def _write_store(self, dataset: Iterable[Dict[str, Any]], save_dir: str, progress_callback: Optional[Callable[[str, int, int], None]] = None, existing: Optional[Dict[str, Any]] = None):
+        """
+        Stream `dataset` into a new store at `save_dir`.
+
+        Chunks of new documents are embedded in batches of `EMBED_BATCH_SIZE`, several
+        batches at a time, and appended in order as they complete. Every appended batch
+        is checkpointed: if the write is interrupted, the next call recovers the
+        checkpointed chunks instead of embedding them again. With `existing` (see
+        `_read_layout`), rows of unchanged documents are copied from the old store in
+        slices. The old store stays valid until the commit.
+        """
+        resume = self._read_layout(get_resume_path(save_dir), by_chunk=True) if recover_checkpoint(save_dir) else None
+        checkpoint_path = get_checkpoint_path(save_dir)
+        writer = VectorStoreWriter(save_dir)
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # Pending appends in store order: ("embed", future, lines) or ("copy", embeddings, lines)
+        segments = deque()
+        pending_texts, pending_lines, pending_resumed = [], [], []
+        embedded = kept = resumed = chunks_seen = new_docs = 0
+        in_order = True
+        metadata_files = {}
+        start = time.monotonic()
+
+        try:
+            if existing:
+                metadata_files["existing"] = open(existing["metadata_path"], "rb")
+            if resume:
+                metadata_files["resume"] = open(resume["metadata_path"], "rb")
+
+            with tqdm(desc="Embedding chunks", unit="chunk") as pbar:
+                def append_head():
+                    nonlocal embedded
+                    kind, payload, lines = segments.popleft()
+                    writer.append(payload.result() if kind == "embed" else payload, lines)
+                    if kind != "embed":
+                        return
+                    writer.checkpoint(checkpoint_path)
+                    embedded += len(lines)
+                    pbar.update(len(lines))
+                    pbar.set_postfix(chunks_per_sec=f"{embedded / (time.monotonic() - start):.1f}")
+                    if progress_callback:
+                        progress_callback("embed", embedded, chunks_seen - kept - resumed)
+
+                def drain(max_segments):
+                    # Append finished segments; block on the oldest one while too many are queued
+                    while segments and (
+                        len(segments) > max_segments or segments[0][0] != "embed" or segments[0][1].done()
+                    ):
+                        append_head()
+
+                def push(kind, payload, lines):
+                    segments.append((kind, payload, lines))
+                    drain(2 * self.max_concurrency)
+
+                def flush_embed():
+                    if pending_texts:
+                        push("embed", executor.submit(self._embed_batch, list(pending_texts)), list(pending_lines))
+                        pending_texts.clear()
+                        pending_lines.clear()
+
+                def flush_resumed():
+                    for embeddings, lines in self._read_rows(resume, metadata_files.get("resume"), pending_resumed):
+                        push("copy", embeddings, lines)
+                    pending_resumed.clear()
+
+                for doc in dataset:
+                    uuid, rows = existing["docs"].get(doc['doc_id'], (None, None)) if existing else (None, None)
+                    if rows is not None and uuid == doc['original_uuid']:
+                        in_order = in_order and rows == list(range(kept, kept + len(rows)))
+                        for embeddings, lines in self._read_rows(existing, metadata_files["existing"], rows):
+                            push("copy", embeddings, lines)
+                        kept += len(rows)
+                        chunks_seen += len(rows)
+                        continue
+
+                    new_docs += 1
+                    for chunk in doc['chunks']:
+                        chunks_seen += 1
+                        resumed_row = resume["chunks"].get(f"{doc['original_uuid']}:{chunk['chunk_id']}") if resume else None
+                        if resumed_row is not None:
+                            pending_resumed.append(resumed_row)
+                            resumed += 1
+                            if len(pending_resumed) >= COPY_BATCH_SIZE:
+                                flush_resumed()
+                            continue
+
+                        pending_texts.append(chunk['content'])
+                        pending_lines.append(json.dumps({
+                            'doc_id': doc['doc_id'],
+                            'original_uuid': doc['original_uuid'],
+                            'chunk_id': chunk['chunk_id'],
+                            'original_index': chunk['original_index'],
+                            'content': chunk['content']
+                        }))
+                        if len(pending_texts) >= EMBED_BATCH_SIZE:
+                            flush_embed()
+                flush_resumed()
+                flush_embed()
+                drain(0)
+        except BaseException:
+            # Keep the checkpointed rows for the next attempt
+            for kind, payload, _ in segments:
+                if kind == "embed":
+                    payload.cancel()
+            writer.close()
+            raise
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for file in metadata_files.values():
+                file.close()
+
+        elapsed = time.monotonic() - start
+        metrics.incr("ingestion.chunks_embedded", embedded)
+        if embedded:
+            metrics.observe("ingestion.embed_chunks_per_sec", embedded / elapsed)
+
+        if existing is not None and not embedded and not resumed and in_order and kept == len(existing["offsets"]):
+            writer.abort()
+            print("Vector database is up to date.")
+        else:
+            self.embeddings = writer.finish()
+            self.metadata = []
+            self.build_index()
+            writer.commit(self.index)
+
+            # Drop the references to the temporary files; the store is reloaded with `load_db`
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+            self.index = None
+
+            summary = f"embedded {embedded} chunks in {elapsed:.1f}s, recovered {resumed}"
+            if existing is None:
+                print(f"Vector database saved: {summary}.")
+            else:
+                print(
+                    f"Vector database updated: kept {kept} chunks, removed {len(existing['offsets']) - kept}, "
+                    f"{summary}, from {new_docs} changed documents."
+                )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        remove_store(get_resume_path(save_dir))
+
+    def _read_rows(self, layout: Dict[str, Any], metadata_file, rows: List[int]) -> Iterator[Tuple[np.ndarray, List[str]]]:
+        """Read rows of a store indexed by `_read_layout`, `COPY_BATCH_SIZE` rows at a time."""
+        for i in range(0, len(rows), COPY_BATCH_SIZE):
+            batch = rows[i : i + COPY_BATCH_SIZE]
+            lines = []
+            for row in batch:
+                metadata_file.seek(layout["offsets"][row])
+                lines.append(metadata_file.readline().decode("utf-8"))
+            yield np.asarray(layout["embeddings"][batch], dtype=np.float32), lines
+
+    def build_index(self):
+        """Build the ANN index when running in "ivf" mode and the corpus is large enough."""
+        self.index = None
+        if self.index_type != "ivf" or len(self.embeddings) < IVF_MIN_CHUNKS:
+            return
+        self.index = IVFIndex(nlist=self.nlist, nprobe=self.nprobe)
+        self.index.build(self.embeddings)
+        print(f"Built IVF index: {self.index.nlist} lists, recall@10 = {self.evaluate_recall():.3f}")
+
+    def evaluate_recall(self, k: int = 10, sample_size: int = 200, nprobe: int = None) -> float:
+        """
+        Measure recall@k of the ANN index against exact search, using a sample of
+        the stored vectors as queries. Returns 1.0 when no index is in use.
+        """
+        if self.index is None:
+            return 1.0
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(self.embeddings), size=min(sample_size, len(self.embeddings)), replace=False)
+        hits = 0
+        for row in sample:
+            query = np.asarray(self.embeddings[row], dtype=np.float32)
+            exact = top_k(self.embeddings @ query, k)
+            approx, _ = self.index.search(self.embeddings, query, k, nprobe=nprobe)
+            hits += len(np.intersect1d(exact, approx))
+        return hits / (len(sample) * min(k, len(self.embeddings)))
+
+    def _search_many(self, query_embeddings: np.ndarray, k: int, exact: bool = False):
+        """
+        Return per-query (row indices, similarities) of the top `k` chunks, best first.
+
+        Exact search scores every query with a single (Q x D) . (D x N) product.
+        """
+        if self.index is not None and not exact:
+            return [self.index.search(self.embeddings, query, k) for query in query_embeddings]
+
+        # Score directly against the (possibly memory-mapped) float32 matrix
+        similarities = query_embeddings @ self.embeddings.T
+        k = min(k, similarities.shape[1])
+        if k < similarities.shape[1]:
+            candidates = np.argpartition(similarities, -k, axis=1)[:, -k:]
         else:
-            query_embedding = self.client.embed(texts=[query], model="embed-multilingual-v3.0", input_type="search_query").embeddings[0]
-            self.query_cache[query] = query_embedding
+            candidates = np.tile(np.arange(similarities.shape[1]), (similarities.shape[0], 1))
+        candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        top_indices = np.take_along_axis(candidates, order, axis=1)
+        top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+        return list(zip(top_indices, top_scores))
+
+    async def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed queries as a (Q, D) float32 matrix, sending all cache misses in one request."""
+        return _to_matrix(await self.query_embedder.embed(queries))
 
-        if not self.embeddings:
+    async def ainvoke(self, query: str,  recall_chunks: int = None, exact: bool = False) -> List[Dict[str, Any]]:
+        """
+        Asynchronous search method.
+
+        :param exact: Bypass the ANN index and scan every chunk.
+        """
+        return (await self.ainvoke_many([query], recall_chunks=recall_chunks, exact=exact))[0]
+
+    async def ainvoke_many(self, queries: List[str], recall_chunks: int = None, exact: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries at once.
+
+        :param queries: Queries to search.
+        :param recall_chunks: Number of chunks to return per query (defaults to `k`).
+        :param exact: Bypass the ANN index and scan every chunk.
+        :return: One result list per query, in the same order and shape as `ainvoke`.
+        """
+        if not queries:
+            return []
+        if len(self.embeddings) == 0:
             raise ValueError("No data loaded in the vector database.")
-        
-        # Split embeddings into manageable chunks for parallel processing
-        chunk_size = 1000  # Adjust based on your system's capabilities
-        tasks = [
-            self.async_dot_product(np.array(self.embeddings[i:i + chunk_size]), query_embedding)
-            for i in range(0, len(self.embeddings), chunk_size)
-        ]
-
-        # Compute dot products in parallel
-        chunk_similarities = await asyncio.gather(*tasks)
-        
-        # Concatenate results
-        similarities = np.concatenate(chunk_similarities)
-        
-        # Sort and filter results
-        top_indices = np.argsort(similarities)[::-1][:self.k if recall_chunks is None else recall_chunks]
-        
-        top_results = []
-        for idx in top_indices:
-            if float(similarities[idx]) >= self.threshold:
-                result = {
-                    "metadata": self.metadata[idx],
-                    "similarity": float(similarities[idx]),
-                }
-                top_results.append(result)
-
-        return top_results
+
+        query_embeddings = await self._embed_queries(queries)
+        searches = self._search_many(
+            query_embeddings,
+            self.k if recall_chunks is None else recall_chunks,
+            exact=exact,
+        )
+
+        all_results = []
+        for top_indices, similarities in searches:
+            top_results = []
+            for idx, similarity in zip(top_indices, similarities):
+                if float(similarity) >= self.threshold:
+                    result = {
+                        "metadata": self.metadata[idx],
+                        "similarity": float(similarity),
+                    }
+                    top_results.append(result)
+            all_results.append(top_results)
+
+        return all_results
 
     def save_db(self, save_dir):
-        data = {
-            "embeddings": self.embeddings,
-            "metadata": self.metadata,
-            "query_cache": json.dumps(self.query_cache),
-        }
-        os.makedirs(os.path.dirname(save_dir), exist_ok=True)
-        with open(save_dir, "wb") as file:
-            pickle.dump(data, file)
+        """
+        Persist the store as a float32 `.npy` matrix, a JSON-lines metadata file
+        and a manifest, through a `VectorStoreWriter`.
+        """
+        writer = VectorStoreWriter(save_dir)
+        try:
+            for i in range(0, len(self.metadata), COPY_BATCH_SIZE):
+                writer.append(
+                    self.embeddings[i : i + COPY_BATCH_SIZE],
+                    [json.dumps(meta) for meta in self.metadata[i : i + COPY_BATCH_SIZE]],
+                )
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit(self.index)
 
     def load_db(self, load_dir):
-        if not os.path.exists(load_dir):
-            raise ValueError("Vector database file not found. Use load_data to create a new database.")
-        with open(load_dir, "rb") as file:
+        """
+        Load a store saved by `save_db`. The embedding matrix is memory-mapped
+        rather than read, so loading is independent of corpus size. Legacy
+        pickled stores are migrated to the current format on first load.
+        """
+        embeddings_path, _, manifest_path = get_store_paths(load_dir)
+        if not os.path.exists(manifest_path):
+            legacy_path = os.path.splitext(embeddings_path)[0] + ".pkl"
+            if not os.path.exists(legacy_path):
+                raise ValueError("Vector database file not found. Use load_data to create a new database.")
+            self.migrate_legacy_db(legacy_path)
+
+        with open(manifest_path, "r") as file:
+            manifest = json.load(file)
+        if manifest.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector database format: {manifest.get('format_version')}")
+
+        self.version = _manifest_version(manifest, manifest_path)
+        embeddings_path, metadata_path = get_data_paths(load_dir, manifest)
+        self.embeddings = np.load(embeddings_path, mmap_mode="r")
+        with open(metadata_path, "r") as file:
+            self.metadata = [json.loads(line) for line in file]
+
+        if len(self.metadata) != self.embeddings.shape[0]:
+            raise ValueError("Vector database is corrupt: metadata and embeddings are out of sync.")
+
+        self.index = None
+        index_path = get_index_path(load_dir)
+        if os.path.exists(index_path):
+            self.index = IVFIndex.load(index_path)
+            self.index.nprobe = self.nprobe
+            # The index is written before the manifest, so it may belong to another commit
+            if self.index.store_version != self.version:
+                print(f"Ignoring stale IVF index: {index_path}")
+                self.index = None
+
+    def migrate_legacy_db(self, legacy_path):
+        """Convert a version 1 pickled store into the current on-disk format."""
+        with open(legacy_path, "rb") as file:
             data = pickle.load(file)
-        self.embeddings = data["embeddings"]
+        self.embeddings = _to_matrix(data["embeddings"])
         self.metadata = data["metadata"]
-        self.query_cache = json.loads(data["query_cache"])
+        query_cache = json.loads(data.get("query_cache", "{}"))
+        if query_cache and self.query_embedder.cache is not None:
+            # Carry the old per-store query embeddings over into the shared cache
+            self.query_embedder.cache.put_many(EMBEDDING_MODEL, "search_query", query_cache)
+        self.build_index()
+        self.save_db(legacy_path)
+        print(f"Migrated legacy vector database: {legacy_path}")
 
     def validate_embedded_chunks(self):
         unique_contents = set()
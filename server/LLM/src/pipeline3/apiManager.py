@@ -1,5 +1,6 @@
 import os
 import time
+import threading
 from pprint import pprint
 from dotenv import load_dotenv
 
@@ -9,6 +10,8 @@ class ApiManager:
     def __init__(self):
         self.api_keys = {}
         self.api_usage = {}
+        # Keys are handed out from several threads, e.g. concurrent embedding batches
+        self._lock = threading.Lock()
 
         # Load API keys from environment variables
         for key, value in os.environ.items():
@@ -36,14 +39,12 @@ class ApiManager:
         expiry = self.api_usage[service][key]['expiry']
         return expiry is not None and time.time() > expiry
 
-    def get_key(self, service):
-        if service not in self.api_keys:
-            raise Exception(f"No API keys available for service: {service}")
-
+    def _take_key(self, service):
+        """Count a call against the first key with calls left; None if every key is used up."""
         for key, limit, period in self.api_keys[service]:
-            usage = self.api_usage[service][key]
             if self._is_key_expired(service, key):
                 self._reset_key(service, key)
+            usage = self.api_usage[service][key]
 
             if usage['count'] < limit:
                 if usage['expiry'] is None:
@@ -52,8 +53,29 @@ class ApiManager:
                 usage['count'] += 1
                 print(f"Using {service} API key : {key}")
                 return key
+        return None
+
+    def get_key(self, service, wait=False):
+        """
+        Return a key of `service` with calls left in its current period.
+
+        :param wait: When every key is used up, block until the first one's period
+            ends instead of raising; for background work such as ingestion.
+        """
+        if service not in self.api_keys:
+            raise Exception(f"No API keys available for service: {service}")
 
-        raise Exception(f"No valid API keys available for service: {service}")
+        while True:
+            with self._lock:
+                key = self._take_key(service)
+                if key is not None:
+                    return key
+                expiries = [usage['expiry'] for usage in self.api_usage[service].values() if usage['expiry'] is not None]
+            if not wait or not expiries:
+                raise Exception(f"No valid API keys available for service: {service}")
+            delay = max(min(expiries) - time.time(), 0) + 0.01
+            print(f"All {service} API keys are used up, waiting {delay:.1f}s")
+            time.sleep(delay)
 
     def reset(self):
         for service in self.api_usage:
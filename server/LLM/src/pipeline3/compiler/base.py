@@ -231,6 +231,14 @@ class StructuredTool(BaseTool):
     coroutine: Optional[Callable[..., Awaitable[Any]]] = None
     """The asynchronous version of the function."""
     stringify_rule: Optional[Callable[..., str]] = None
+    max_concurrency: Optional[int] = None
+    """Calls of the tool a process runs at once when scheduled from plans; None for no limit."""
+    rate_per_sec: Optional[float] = None
+    """Calls of the tool a process starts per second when scheduled from plans; None for no limit."""
+    max_queued: Optional[int] = None
+    """Calls allowed to wait for the limits above before failing; defaults to `tool_limits.DEFAULT_MAX_QUEUED`."""
+    timeout: Optional[float] = None
+    """Seconds a plan task calling the tool may take, waiting for the limits included; defaults to `TASK_TIMEOUT`."""
 
     # --- Runnable ---
 
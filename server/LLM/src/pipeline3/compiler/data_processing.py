@@ -1,3 +1,12 @@
+import os
+import re
+import asyncio
+from src.components.ChartRenderer import CHART_URL_PREFIX, get_chart_renderer
+
+# Seconds the answer waits for a chart that is still rendering before dropping it.
+CHART_WAIT_TIMEOUT = float(os.environ.get("CHART_WAIT_TIMEOUT", 30))
+
+
 class DataProcessor:
     def __init__(self, agent, executor_callback=None, benchmark=False):
         from src.pipeline3.compiler.llm_compiler import LLMCompilerAgent
@@ -35,4 +44,31 @@ class DataProcessor:
             markdown_prompt, callbacks=[self.executor_callback] if self.benchmark else None
         )
         markdown_output = str(response)
-        return markdown_output
\ No newline at end of file
+        return markdown_output
+
+    async def replace_graph_placeholders(self, answer, tasks):
+        """
+        Swap graph(idx) placeholders, bare or inside markdown images, for the URL of
+        the chart rendered by task idx. Waits up to `CHART_WAIT_TIMEOUT` seconds for
+        each referenced chart that is still rendering; placeholders without a rendered
+        chart are dropped.
+        """
+        referenced = {int(idx) for idx in re.findall(r"graph\((\d+)\)", answer)}
+        urls = {}
+        for idx, task in tasks.items():
+            observation = str(task.observation or "")
+            if int(idx) in referenced and task.name == "graph_maker" and observation.startswith(CHART_URL_PREFIX):
+                try:
+                    rendered = await asyncio.wait_for(get_chart_renderer().wait(observation), CHART_WAIT_TIMEOUT)
+                except TimeoutError:
+                    print(f"Chart {observation} did not render within {CHART_WAIT_TIMEOUT:g}s")
+                    rendered = False
+                if rendered:
+                    urls[int(idx)] = observation
+
+        def image(match, alt="Generated Image"):
+            url = urls.get(int(match.group("idx")))
+            return f"![{match.groupdict().get('alt') or alt}]({url})" if url else ""
+
+        answer = re.sub(r"!\[(?P<alt>[^\]]*)\]\(\s*graph\((?P<idx>\d+)\)\s*\)", image, answer)
+        return re.sub(r"graph\((?P<idx>\d+)\)", image, answer)
@@ -277,7 +277,7 @@ class LLMCompiler(Chain, extra="allow"):
             task_fetching_unit = TaskFetchingUnit()
             if self.planner_stream:
                 task_queue = asyncio.Queue()
-                asyncio.create_task(
+                planning = asyncio.create_task(
                     self.planner.aplan(
                         inputs=inputs,
                         task_queue=task_queue,
@@ -287,9 +287,13 @@ class LLMCompiler(Chain, extra="allow"):
                         else None,
                     )
                 )
-                await task_fetching_unit.aschedule(
-                    task_queue=task_queue, func=lambda x: None
-                )
+                try:
+                    await task_fetching_unit.aschedule(
+                        task_queue=task_queue, func=lambda x: None
+                    )
+                finally:
+                    # Stop planning if the query was cancelled mid-plan
+                    planning.cancel()
             else:
                 await self.message_manager.send_message("Analyzing query")
                 tasks = await self.planner.plan(
@@ -332,7 +336,7 @@ class LLMCompiler(Chain, extra="allow"):
                 if answer != NO_ANWER_REPLY:
                     processor = DataProcessor(agent=self.agent, executor_callback=[self.executor_callback], benchmark=self.benchmark)
                     answer = await processor.convert_to_markdown(answer)
-                    # answer = processor.replace_graph_placeholders(answer, tasks)
+                    answer = await processor.replace_graph_placeholders(answer, tasks)
                     log_task_execution(self.user_id, self.ticker_name, self.other_mentioned_ticker_names, tasks, answer)
                 break
 
@@ -72,6 +72,11 @@ def flush_results(save_path, results):
     print("Saving results")
     json.dump(results, open(save_path, "w"), indent=4)
 
+def get_log_dir() -> str:
+    """Directory the task execution logs are written to."""
+    return os.path.abspath(os.path.join(os.getcwd(), "..", "logs"))
+
+
 def log_task_execution(user_id: str, chat_profile: str, comparison_profiles: List[str], tasks, final_answer):
     # Get current UTC time with ISO format
     timestamp = datetime.now(timezone.utc).isoformat()
@@ -87,6 +92,8 @@ def log_task_execution(user_id: str, chat_profile: str, comparison_profiles: Lis
             "thought": task.thought,
             "observation": task.observation,
             "is_join": task.is_join,
+            "queue_wait": task.queue_wait,
+            "latency": task.latency,
         }
         data.append(task_info)
 
@@ -101,7 +108,7 @@ def log_task_execution(user_id: str, chat_profile: str, comparison_profiles: Lis
     }
 
     # Ensure log directory exists
-    log_dir = os.path.abspath(os.path.join(os.getcwd(), "..", "logs"))
+    log_dir = get_log_dir()
     os.makedirs(log_dir, exist_ok=True)
 
     # Generate filename
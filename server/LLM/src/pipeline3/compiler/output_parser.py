@@ -8,6 +8,7 @@ from langchain.agents.agent import AgentOutputParser
 from langchain.schema import OutputParserException
 
 from .task_fetching_unit import Task
+from .tool_limits import get_tool_limiter
 from .base import StructuredTool, Tool
 
 THOUGHT_PATTERN = r"Thought: ([^\n]*)"
@@ -133,6 +134,8 @@ def instantiate_task(
         # join does not have a tool
         tool_func = lambda x: None
         stringify_rule = None
+        limiter = None
+        timeout = None
     else:
         tool = _find_tool(tool_name, tools)
         if hasattr(tool, 'coroutine') and tool.coroutine:
@@ -140,6 +143,13 @@ def instantiate_task(
         else:
             tool_func = tool.func
         stringify_rule = tool.stringify_rule
+        limiter = get_tool_limiter(
+            tool_name,
+            max_concurrency=getattr(tool, "max_concurrency", None),
+            rate_per_sec=getattr(tool, "rate_per_sec", None),
+            max_queued=getattr(tool, "max_queued", None),
+        )
+        timeout = getattr(tool, "timeout", None)
     return Task(
         idx=idx,
         name=tool_name,
@@ -149,4 +159,6 @@ def instantiate_task(
         stringify_rule=stringify_rule,
         thought=thought,
         is_join=tool_name == "join",
+        limiter=limiter,
+        timeout=timeout,
     )
\ No newline at end of file
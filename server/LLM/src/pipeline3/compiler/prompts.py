@@ -57,9 +57,9 @@ OUTPUT_PROMPT = (
     'fundamental_data_retriever("Apple", "Extract detailed financial fundamentals, such as total revenue, net profit margin, operational costs, and key financial ratios.")\n'
     """Observation: Apple's revenue and net profit margins remain strong, supported by a diversified product portfolio and strategic market expansion.\n"""
     'graph_maker($4, "line", "Tesla Stock Performance Over 4 Years", "Year", "Stock Price (USD)")\n'
-    """Observation: ('graph(4)', 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgA') \n"""
+    """Observation: /static/charts/3f6c1d2e9a4b7c8d0e1f2a3b4c5d6e7f.png\n"""
     'graph_maker($5, "bar", "Comparative Financial Data of Tesla and Apple", "Category", "USD (in billions)")\n'
-    """Observation: ('graph(5)', 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgA') \n"""
+    """Observation: /static/charts/9b8a7c6d5e4f3a2b1c0d9e8f7a6b5c4d.png\n"""
     "Thought: The gathered observations include comprehensive macroeconomic, stock performance, and fundamental data for Tesla and Apple. The generated graphs provide valuable visual insights.\n"
     f"Action: {JOINNER_FINISH}(Both Tesla and Apple face macroeconomic challenges such as inflation and supply chain disruptions. Tesla’s growth is driven by its innovative EV and battery technology, supported by renewable energy expansion. Meanwhile, Apple benefits from its strong financial health and innovation in products like wearables and AI. Their strategic sustainability initiatives position both companies to adapt to future market trends.\n"
     "\n"
@@ -70,7 +70,7 @@ class TaskExecutor:
                 benchmark=self.benchmark
             )
             answer = await processor.convert_to_markdown(answer)
-            # answer = processor.replace_graph_placeholders(answer, tasks)
+            answer = await processor.replace_graph_placeholders(answer, tasks)
             log_task_execution(
                 self.user_id, 
                 self.ticker_name, 
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import os
+import time
 import asyncio
 from dataclasses import dataclass
 from typing import Any, Callable, Collection, Dict, List, Optional
 
 from .logger_utils import log
+from .tool_limits import ToolLimiter
+from .task_priority import compute_critical_paths, get_tool_latencies
+from src.components.Metrics import metrics
 
-SCHEDULING_INTERVAL = 0.01  # seconds
+# Seconds a task may take when neither the task nor its tool sets a timeout.
+TASK_TIMEOUT = float(os.environ.get("TASK_TIMEOUT", 60))
 
 
 def _default_stringify_rule_for_arguments(args):
@@ -35,6 +41,9 @@ def _replace_arg_mask_with_real_value(
         )
     elif isinstance(args, str):
         for dependency in sorted(dependencies, reverse=True):
+            # The planner may reference a task it never defined; its mask stays as is
+            if dependency not in tasks:
+                continue
             # consider both ${1} and $1 (in case planner makes a mistake)
             for arg_mask in ["${" + str(dependency) + "}", "$" + str(dependency)]:
                 if arg_mask in args:
@@ -58,6 +67,10 @@ class Task:
     thought: Optional[str] = None
     observation: Optional[str] = None
     is_join: bool = False
+    limiter: Optional[ToolLimiter] = None
+    queue_wait: Optional[float] = None
+    latency: Optional[float] = None
+    timeout: Optional[float] = None
 
     async def __call__(self) -> Any:
         log("running task")
@@ -94,26 +107,56 @@ class TaskFetchingUnit:
     remaining_tasks: set[str]
 
     def __init__(self):
+        """
+        Runs a plan's tasks as a DAG, each as soon as its dependencies are done.
+
+        Every task keeps a count of its unfinished dependencies and every task a list
+        of its dependents; a finishing task decrements its dependents' counts and
+        starts the ones that reach zero, so no scheduling loop polls for ready tasks.
+        Tasks on the longest expected chain to the end of the plan go first: ready
+        tasks start in that order and wait for limited tools with that priority.
+        A task that runs past its timeout is abandoned with a "timed out"
+        observation, so its dependents and the join go on without it; cancelling
+        `schedule` or `aschedule` cancels every running task.
+        Running tasks belong to the `asyncio.TaskGroup` of the current `schedule` or
+        `aschedule` call, which returns once all of them are done.
+        """
         self.tasks = {}
         self.tasks_done = {}
         self.remaining_tasks = set()
+        self._pending_dependencies: Dict[str, int] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self._critical_paths: Dict[str, float] = {}
+        self._task_group: Optional[asyncio.TaskGroup] = None
 
     def set_tasks(self, tasks: dict[str, Any]):
         self.tasks.update(tasks)
         self.tasks_done.update({task_idx: asyncio.Event() for task_idx in tasks})
         self.remaining_tasks.update(set(tasks.keys()))
+        for task_idx, task in tasks.items():
+            # Dependencies the plan never defined can't hold a task back
+            pending = {
+                d for d in task.dependencies
+                if d != task_idx and d in self.tasks_done and not self.tasks_done[d].is_set()
+            }
+            self._pending_dependencies[task_idx] = len(pending)
+            for d in pending:
+                self._dependents.setdefault(d, []).append(task_idx)
+        # New tasks can lengthen the chains of the tasks they depend on
+        self._critical_paths = compute_critical_paths(self.tasks, get_tool_latencies().estimate)
 
     def _all_tasks_done(self):
         return all(self.tasks_done[d].is_set() for d in self.tasks_done)
 
+    def _by_critical_path(self, task_names: List[str]) -> List[str]:
+        return sorted(task_names, key=lambda task_name: self._critical_paths.get(task_name, 0.0), reverse=True)
+
     def _get_all_executable_tasks(self):
-        return [
+        return self._by_critical_path([
             task_name
             for task_name in self.remaining_tasks
-            if all(
-                self.tasks_done[d].is_set() for d in self.tasks[task_name].dependencies
-            )
-        ]
+            if self._pending_dependencies[task_name] == 0
+        ])
 
     def _preprocess_args(self, task: Task):
         """Replace dependency placeholders, i.e. ${1}, in task.args with the actual observation."""
@@ -123,52 +166,91 @@ class TaskFetchingUnit:
             args.append(arg)
         task.args = args
 
+    def _start_task(self, task_name: str):
+        self.remaining_tasks.remove(task_name)
+        self._task_group.create_task(self._run_task(self.tasks[task_name]))
+
+    def _start_executable_tasks(self):
+        for task_name in self._get_all_executable_tasks():
+            self._start_task(task_name)
+
+    def _complete_task(self, task_name: str):
+        """Mark a task done and start the dependents it was the last dependency of."""
+        self.tasks_done[task_name].set()
+        released = []
+        for dependent in self._dependents.pop(task_name, []):
+            self._pending_dependencies[dependent] -= 1
+            if self._pending_dependencies[dependent] == 0 and dependent in self.remaining_tasks:
+                released.append(dependent)
+        for dependent in self._by_critical_path(released):
+            self._start_task(dependent)
+
+    async def _timed_call(self, task: Task) -> Any:
+        start = time.monotonic()
+        try:
+            return await task()
+        finally:
+            task.latency = time.monotonic() - start
+            metrics.observe(f"tools.{task.name}.latency", task.latency)
+
+    async def _call_task(self, task: Task) -> Any:
+        """Run the task's tool within the tool's concurrency and rate limits, recording the wait."""
+        if task.limiter is None:
+            return await self._timed_call(task)
+        task.queue_wait = await task.limiter.acquire(priority=lambda: -self._critical_paths.get(task.idx, 0.0))
+        if task.queue_wait > 0:
+            log(f"Task {task.idx} ({task.name}) waited {task.queue_wait:.3f}s for the tool's limits")
+        try:
+            return await self._timed_call(task)
+        finally:
+            task.limiter.release()
+
     async def _run_task(self, task: Task):
-        self._preprocess_args(task)
-        if not task.is_join:
-            observation = await task()
-            task.observation = observation
-        self.tasks_done[task.idx].set()
+        if task.is_join:
+            self._preprocess_args(task)
+        else:
+            timeout = task.timeout if task.timeout is not None else TASK_TIMEOUT
+            try:
+                self._preprocess_args(task)
+                async with asyncio.timeout(timeout):
+                    task.observation = await self._call_task(task)
+            except TimeoutError:
+                log(f"Task {task.idx} ({task.name}) timed out after {timeout:g}s")
+                metrics.incr(f"tools.{task.name}.timeouts")
+                task.observation = f"Timed out after {timeout:g}s without a result."
+            except Exception as e:
+                # The error becomes the observation, so dependents and the joiner see it
+                log(f"Task {task.idx} ({task.name}) failed: {e!r}")
+                task.observation = f"Error: {e}"
+        self._complete_task(task.idx)
+
+    def _report_unrunnable_tasks(self):
+        if self.remaining_tasks:
+            log(f"Tasks {sorted(self.remaining_tasks)} were not run: their dependencies never completed")
 
     async def schedule(self):
         """Run all tasks in self.tasks in parallel, respecting dependencies."""
-        # run until all tasks are done
-        while not self._all_tasks_done():
-            # Find tasks with no dependencies or with all dependencies met
-            executable_tasks = self._get_all_executable_tasks()
-
-            for task_name in executable_tasks:
-                asyncio.create_task(self._run_task(self.tasks[task_name]))
-                self.remaining_tasks.remove(task_name)
-
-            await asyncio.sleep(SCHEDULING_INTERVAL)
+        async with asyncio.TaskGroup() as task_group:
+            self._task_group = task_group
+            self._start_executable_tasks()
+        self._task_group = None
+        self._report_unrunnable_tasks()
 
     async def aschedule(self, task_queue: asyncio.Queue[Optional[Task]], func):
         """Asynchronously listen to task_queue and schedule tasks as they arrive."""
-        no_more_tasks = False  # Flag to check if all tasks are received
-
-        while True:
-            if not no_more_tasks:
+        async with asyncio.TaskGroup() as task_group:
+            self._task_group = task_group
+            while True:
                 # Wait for a new task to be added to the queue
                 task = await task_queue.get()
 
                 # Check for sentinel value indicating end of tasks
                 if task is None:
-                    no_more_tasks = True
-                else:
-                    # Parse and set the new tasks
-                    self.set_tasks({task.idx: task})
-
-            # Schedule and run executable tasks
-            executable_tasks = self._get_all_executable_tasks()
-
-            if executable_tasks:
-                for task_name in executable_tasks:
-                    asyncio.create_task(self._run_task(self.tasks[task_name]))
-                    self.remaining_tasks.remove(task_name)
-            elif no_more_tasks and self._all_tasks_done():
-                # Exit the loop if no more tasks are expected and all tasks are done
-                break
-            else:
-                # If no executable tasks are found, sleep for the SCHEDULING_INTERVAL
-                await asyncio.sleep(SCHEDULING_INTERVAL)
\ No newline at end of file
+                    break
+                # Parse and set the new task, and start it if its dependencies are done
+                self.set_tasks({task.idx: task})
+                if self._pending_dependencies[task.idx] == 0:
+                    self._start_task(task.idx)
+            # Leaving the group waits for the running tasks and the dependents they start
+        self._task_group = None
+        self._report_unrunnable_tasks()
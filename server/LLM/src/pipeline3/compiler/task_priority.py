@@ -0,0 +1,105 @@
+import os
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+from src.components.Metrics import metrics
+from .logger_utils import get_log_dir, log
+
+# Seconds assumed for a tool with no recorded calls.
+DEFAULT_TOOL_LATENCY = float(os.environ.get("DEFAULT_TOOL_LATENCY", 1.0))
+# Most recent task execution logs read for historical latencies.
+LATENCY_HISTORY_FILES = 500
+
+
+class ToolLatencies:
+    def __init__(self, default: float = DEFAULT_TOOL_LATENCY):
+        """
+        Expected duration of a call per tool.
+
+        A tool's estimate is the mean latency of its calls in this process, recorded
+        as the `tools.<name>.latency` metric; before the tool has run, the mean over
+        the recent task execution logs; failing that, `default`.
+
+        :param default: Seconds assumed for a tool with neither.
+        """
+        self.default = default
+        self.history: Dict[str, float] = {}
+
+    def load_history(self, log_dir: Optional[str] = None, max_files: int = LATENCY_HISTORY_FILES):
+        """Average the task latencies recorded in the newest `max_files` task execution logs."""
+        log_dir = log_dir or get_log_dir()
+        try:
+            paths = [os.path.join(log_dir, name) for name in os.listdir(log_dir) if name.endswith(".json")]
+        except FileNotFoundError:
+            return
+        paths = sorted(paths, key=os.path.getmtime)[-max_files:]
+
+        totals: Dict[str, List[float]] = {}
+        for path in paths:
+            try:
+                with open(path, "r") as file:
+                    records = json.load(file).get("data", [])
+            except (OSError, ValueError, AttributeError):
+                continue
+            for record in records:
+                if record.get("latency") is not None and not record.get("is_join"):
+                    total = totals.setdefault(record["name"], [0.0, 0])
+                    total[0] += record["latency"]
+                    total[1] += 1
+        self.history = {name: total / count for name, (total, count) in totals.items()}
+        log(f"Loaded latencies of {len(self.history)} tools from {len(paths)} task execution logs")
+
+    def estimate(self, tool_name: str) -> float:
+        latency = metrics.mean(f"tools.{tool_name}.latency")
+        if latency is not None:
+            return latency
+        return self.history.get(tool_name, self.default)
+
+
+def compute_critical_paths(tasks: Dict[int, "Task"], estimate: Callable[[str], float]) -> Dict[int, float]:
+    """
+    Length of the longest chain of tasks from each task to the end of the plan,
+    the task's own expected duration included.
+
+    :param tasks: Plan tasks by index.
+    :param estimate: Expected duration of a call, by tool name; the join costs nothing.
+    """
+    dependents: Dict[int, List[int]] = {}
+    for idx, task in tasks.items():
+        for d in task.dependencies:
+            if d in tasks and d != idx:
+                dependents.setdefault(d, []).append(idx)
+
+    paths: Dict[int, float] = {}
+    visiting = set()
+
+    def visit(idx: int) -> float:
+        if idx in paths:
+            return paths[idx]
+        if idx in visiting:
+            # A cycle: those tasks never run, so they add nothing
+            return 0.0
+        visiting.add(idx)
+        task = tasks[idx]
+        own = 0.0 if task.is_join else estimate(task.name)
+        paths[idx] = own + max((visit(dependent) for dependent in dependents.get(idx, [])), default=0.0)
+        visiting.discard(idx)
+        return paths[idx]
+
+    for idx in tasks:
+        visit(idx)
+    return paths
+
+
+_tool_latencies: Optional[ToolLatencies] = None
+_lock = threading.Lock()
+
+
+def get_tool_latencies() -> ToolLatencies:
+    """Return the process-wide tool latencies, reading the task execution logs on first use."""
+    global _tool_latencies
+    with _lock:
+        if _tool_latencies is None:
+            _tool_latencies = ToolLatencies()
+            _tool_latencies.load_history()
+        return _tool_latencies
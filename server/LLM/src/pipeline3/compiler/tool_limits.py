@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+from typing import Callable, Dict, List, Optional, Tuple
+from src.components.Metrics import metrics
+
+# Tasks a limited tool lets wait for a slot; further calls fail right away.
+DEFAULT_MAX_QUEUED = 32
+
+
+class ToolBusyError(RuntimeError):
+    """Raised when a tool's wait queue is full."""
+
+
+class ToolLimiter:
+    def __init__(self, name: str, max_concurrency: Optional[int] = None, rate_per_sec: Optional[float] = None, max_queued: int = DEFAULT_MAX_QUEUED):
+        """
+        Admission control for one tool, shared by every plan in the process.
+
+        A call starts when fewer than `max_concurrency` calls of the tool are running
+        and at least 1 / `rate_per_sec` seconds have passed since the previous start.
+        Calls that can't start wait in a queue of at most `max_queued` entries and are
+        started lowest priority value first, then in arrival order. Priorities are
+        read whenever a slot frees up, so a waiting call's priority may change.
+
+        :param name: Tool name, used for metrics.
+        :param max_concurrency: Calls allowed to run at once; None for no limit.
+        :param rate_per_sec: Calls allowed to start per second; None for no limit.
+        :param max_queued: Calls allowed to wait; a call beyond it raises `ToolBusyError`.
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.rate_per_sec = rate_per_sec
+        self.max_queued = max_queued
+        self._running = 0
+        self._next_start = 0.0
+        self._waiters: List[Tuple[Callable[[], float], int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start waiting calls, best first, while the limits allow."""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            if self.max_concurrency is not None and self._running >= self.max_concurrency:
+                return
+            now = loop.time()
+            if self._next_start > now:
+                if self._timer is None:
+                    self._timer = loop.call_at(self._next_start, self._on_timer)
+                return
+            entry = min(self._waiters, key=lambda waiter: (waiter[0](), waiter[1]))
+            self._waiters.remove(entry)
+            future = entry[2]
+            if future.done():
+                continue
+            self._running += 1
+            if self.rate_per_sec:
+                self._next_start = now + 1 / self.rate_per_sec
+            future.set_result(None)
+
+    async def acquire(self, priority: Optional[Callable[[], float]] = None) -> float:
+        """
+        Wait until the call may start; every `acquire` must be paired with a `release`.
+
+        :param priority: Returns the call's priority; calls with lower values start first.
+        :return: Seconds spent waiting.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        if len(self._waiters) >= self.max_queued:
+            metrics.incr(f"tools.{self.name}.rejected")
+            raise ToolBusyError(f"Too many {self.name} calls are waiting ({self.max_queued}); try again later.")
+
+        future = loop.create_future()
+        entry = (priority or (lambda: 0.0), next(self._counter), future)
+        self._waiters.append(entry)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation: give the slot back
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+            raise
+
+        waited = loop.time() - start
+        metrics.observe(f"tools.{self.name}.queue_wait", waited)
+        return waited
+
+    def release(self):
+        self._running -= 1
+        self._dispatch()
+
+
+_tool_limiters: Dict[str, ToolLimiter] = {}
+
+
+def get_tool_limiter(name: str, max_concurrency: Optional[int] = None, rate_per_sec: Optional[float] = None, max_queued: Optional[int] = None) -> Optional[ToolLimiter]:
+    """
+    Return the process-wide limiter of a tool, or None if the tool declares no limits.
+
+    Tools are created per request, so limiters are kept by tool name; the limits
+    declared by the latest tool instance apply.
+    """
+    if max_concurrency is None and rate_per_sec is None:
+        return None
+    limiter = _tool_limiters.get(name)
+    if limiter is None:
+        limiter = _tool_limiters[name] = ToolLimiter(name)
+    limiter.max_concurrency = max_concurrency
+    limiter.rate_per_sec = rate_per_sec
+    limiter.max_queued = max_queued if max_queued is not None else DEFAULT_MAX_QUEUED
+    return limiter
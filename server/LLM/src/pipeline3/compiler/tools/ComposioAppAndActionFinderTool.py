@@ -5,6 +5,12 @@ from composio_langchain import ComposioToolSet, Action, App
 from composio import Composio
 from ..base import StructuredTool
 
+# Composio action searches in flight and started per second, across all plans of the process.
+MAX_CONCURRENCY = 2
+RATE_PER_SEC = 2
+# Seconds a Composio action search may take before the plan goes on without it.
+TIMEOUT = 20
+
 class ComposioActionFinderInput(BaseModel):
     userQuery: str = Field(..., description="The userQuery to find the actions for")
     
@@ -55,6 +61,9 @@ class ComposioActionFinderTool:
                     " - Use for Applications operations when needed, avoid otherwise."
                 ),
                 args_schema=ComposioActionFinderInput,
+                max_concurrency=MAX_CONCURRENCY,
+                rate_per_sec=RATE_PER_SEC,
+                timeout=TIMEOUT,
             )
             return action_finder_tool
         except Exception as e:
@@ -65,4 +74,7 @@ class ComposioActionFinderTool:
                 name="action_finder",
                 description="Fallback action finder due to initialization error",
                 args_schema=ComposioActionFinderInput,
+                max_concurrency=MAX_CONCURRENCY,
+                rate_per_sec=RATE_PER_SEC,
+                timeout=TIMEOUT,
             )
\ No newline at end of file
@@ -6,6 +6,12 @@ from composio import Composio
 from ..base import StructuredTool
 import json
 
+# Composio actions in flight and started per second, across all plans of the process.
+MAX_CONCURRENCY = 2
+RATE_PER_SEC = 2
+# Seconds a Composio action may take before the plan goes on without it.
+TIMEOUT = 30
+
 class ComposioInput(BaseModel):
     action: str = Field(..., description="The Composio action to execute")
     parameters: Dict[str, Any] = Field(..., description="Parameters for the action")
@@ -92,5 +98,8 @@ class ComposioTool:
                 " - Use for Applications operations when needed, avoid otherwise."
             ),
             args_schema=ComposioInput,
+            max_concurrency=MAX_CONCURRENCY,
+            rate_per_sec=RATE_PER_SEC,
+            timeout=TIMEOUT,
         )
         return action_executor_tool
\ No newline at end of file
@@ -0,0 +1,66 @@
+import re
+import asyncio
+from typing import List, Optional, Union
+from pydantic import BaseModel
+from src.components.FundamentalsStore import format_fundamentals, get_fundamentals_store
+from ..base import StructuredTool
+
+# Line items returned when the query names none.
+DEFAULT_ITEMS = (
+    "net sales",
+    "operating profit",
+    "net profit",
+    "total assets (crs)",
+    "cash from operating activity",
+    "free cash flow (est)",
+    "net profit margin (%)",
+    "roe (%)",
+    "debt to equity ratio",
+    "p/e",
+)
+
+
+class FundamentalDataRetrieverTool:
+    def __init__(self):
+        self.store = get_fundamentals_store()
+
+    class FundamentalDataRetrieverInput(BaseModel):
+        ticker: Union[str, List[str]]
+        query: str
+        start_year: Optional[int] = None
+        end_year: Optional[int] = None
+
+    def _resolve_tickers(self, ticker: Union[str, List[str]]) -> List[str]:
+        """Split a comma separated ticker string and match each ticker ignoring case and punctuation."""
+        names = ticker if isinstance(ticker, list) else ticker.split(",")
+        by_key = {re.sub(r"\W", "", known).upper(): known for known in self.store.tickers}
+        return [by_key[key] for key in (re.sub(r"\W", "", name).upper() for name in names) if key in by_key]
+
+    def retrieve(self, ticker: Union[str, List[str]], query: str, start_year: Optional[int] = None, end_year: Optional[int] = None) -> str:
+        self.store = get_fundamentals_store()
+        tickers = self._resolve_tickers(ticker)
+        if not tickers:
+            return f"No fundamental data for {ticker}."
+        items = self.store.resolve_items(query) or [item for item in DEFAULT_ITEMS if item in self.store.item_index]
+        return format_fundamentals(*self.store.lookup(tickers, items, start_year, end_year))
+
+    async def aretrieve(self, ticker: Union[str, List[str]], query: str, start_year: Optional[int] = None, end_year: Optional[int] = None) -> str:
+        """Look up fundamentals asynchronously; the store may need recompiling, which reads files."""
+        return await asyncio.to_thread(self.retrieve, ticker, query, start_year, end_year)
+
+    def get_tool(self):
+        """Method to create and return the StructuredTool"""
+        fundamental_data_retriever_tool = StructuredTool.from_function(
+            func=self.aretrieve,
+            name="fundamental_data_retriever",
+            description=(
+                "fundamental_data_retriever(ticker: str, query: str, start_year: int = None, end_year: int = None) -> str:\n"
+                " - Returns tables of financial statement line items and ratios by fiscal year for the ticker.\n"
+                " - ticker may list several tickers separated by commas, e.g. \"TCS, INFY\", to compare them in one call.\n"
+                " - Name the line items you need in the query, e.g. net sales, net profit, total assets, roe, p/e, "
+                "or a whole section: operational ratios, profitability ratios, valuation ratios.\n"
+                " - start_year and end_year optionally limit the fiscal years returned.\n"
+            ),
+            args_schema=self.FundamentalDataRetrieverInput,
+        )
+        return fundamental_data_retriever_tool
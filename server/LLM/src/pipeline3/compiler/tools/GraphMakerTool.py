@@ -0,0 +1,134 @@
+import re
+import ast
+import json
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel
+from src.components.ChartRenderer import get_chart_renderer, make_chart_spec
+from ..base import StructuredTool
+
+
+def _to_number(value: Any):
+    """A number from a cell like "1,234.5", "12%" or "$3.2"; None when it isn't one."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(re.sub(r"[,%$₹€£\s]", "", str(value)))
+    except ValueError:
+        return None
+
+
+def _parse_markdown_tables(text: str) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Read the markdown tables in `text`, e.g. fundamental_data_retriever output: the
+    header holds the categories, each row is a series named by its first cell. With
+    several tables, series names are prefixed with the line above each table.
+    """
+    tables, caption, current = [], "", None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line.startswith("|"):
+            current = None
+            if line:
+                caption = line
+            continue
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        if current is None:
+            current = {"caption": caption, "header": cells[1:], "rows": []}
+            tables.append(current)
+        elif not all(re.fullmatch(r":?-+:?", cell) for cell in cells):
+            current["rows"].append(cells)
+
+    x = []
+    for table in tables:
+        x += [label for label in table["header"] if label not in x]
+    series = []
+    for table in tables:
+        for row in table["rows"]:
+            by_label = dict(zip(table["header"], (_to_number(cell) for cell in row[1:])))
+            name = f"{table['caption']} {row[0]}" if len(tables) > 1 and table["caption"] else row[0]
+            series.append({"name": name, "values": [by_label.get(label) for label in x]})
+    return x, series
+
+
+def parse_chart_data(data: Any) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Turn the data handed to graph_maker into (categories, series).
+
+    Accepts JSON or Python literals as well as already parsed values: a list of
+    numbers, a list of (label, value) pairs, a {label: value} mapping, a
+    {series: [values]} or {series: {label: value}} mapping, or {"x": [...], "y": [...]}
+    / {"x": [...], "series": ...}. Other text is read as markdown tables.
+    """
+    if isinstance(data, str):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                data = parse(data)
+                break
+            except (ValueError, SyntaxError, TypeError):
+                continue
+        else:
+            return _parse_markdown_tables(data)
+
+    if isinstance(data, dict) and "x" in data:
+        x = list(data["x"])
+        series = data.get("series", {"": data.get("y", [])})
+        if isinstance(series, dict):
+            series = [{"name": name, "values": values} for name, values in series.items()]
+        return x, [{"name": s["name"], "values": [_to_number(v) for v in s["values"]]} for s in series]
+    if isinstance(data, dict) and data and all(isinstance(v, dict) for v in data.values()):
+        x = []
+        for values in data.values():
+            x += [label for label in values if label not in x]
+        return x, [{"name": name, "values": [_to_number(values.get(label)) for label in x]} for name, values in data.items()]
+    if isinstance(data, dict) and data and all(isinstance(v, (list, tuple)) for v in data.values()):
+        length = max(len(values) for values in data.values())
+        return list(range(1, length + 1)), [
+            {"name": name, "values": [_to_number(v) for v in values] + [None] * (length - len(values))}
+            for name, values in data.items()
+        ]
+    if isinstance(data, dict):
+        return list(data), [{"name": "", "values": [_to_number(v) for v in data.values()]}]
+    if isinstance(data, (list, tuple)) and data and all(isinstance(item, (list, tuple)) and len(item) == 2 for item in data):
+        return [label for label, _ in data], [{"name": "", "values": [_to_number(v) for _, v in data]}]
+    if isinstance(data, (list, tuple)):
+        return list(range(1, len(data) + 1)), [{"name": "", "values": [_to_number(v) for v in data]}]
+    raise ValueError(f"Unsupported chart data: {type(data).__name__}")
+
+
+class GraphMakerTool:
+    class GraphMakerInput(BaseModel):
+        data: Any
+        graph_type: str = "line"
+        title: str = ""
+        x_label: str = ""
+        y_label: str = ""
+
+    async def make_graph(self, data: Any, graph_type: str = "line", title: str = "", x_label: str = "", y_label: str = "") -> str:
+        """
+        Hand the chart to the renderer and return its URL without waiting for the
+        render; the answer waits for it when it replaces the graph placeholders.
+        """
+        try:
+            x, series = parse_chart_data(data)
+            series = [s for s in series if any(v is not None for v in s["values"])]
+            spec = make_chart_spec(x, series, graph_type, title, x_label, y_label)
+            # Hashing the spec rejects NaN and infinite values with a ValueError
+            return get_chart_renderer().submit(spec)
+        except (ValueError, KeyError, TypeError) as e:
+            return f"Could not draw a graph from the data: {e}"
+
+    def get_tool(self):
+        """Method to create and return the StructuredTool"""
+        graph_maker_tool = StructuredTool.from_function(
+            func=self.make_graph,
+            name="graph_maker",
+            description=(
+                "graph_maker(data, graph_type: str, title: str, x_label: str, y_label: str) -> str:\n"
+                " - Draws a chart and returns its URL; refer to it in the answer as graph(<index of this action>).\n"
+                " - data is usually the output of an earlier action, e.g. $4 for a fundamental_data_retriever table, "
+                "or a JSON object such as {\"2022\": 10.5, \"2023\": 12.1} or {\"x\": [...], \"series\": {\"name\": [...]}}.\n"
+                " - graph_type is one of line, bar, barh, area, scatter, pie.\n"
+            ),
+            args_schema=self.GraphMakerInput,
+        )
+        return graph_maker_tool
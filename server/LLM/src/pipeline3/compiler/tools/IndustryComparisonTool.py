@@ -0,0 +1,56 @@
+import math
+import asyncio
+from pydantic import BaseModel
+from src.components.IndustryIndex import compare_with_industry
+from ..base import StructuredTool
+
+# Peers listed per comparison, largest first.
+PEER_LIMIT = 10
+
+
+def _format_value(value: float) -> str:
+    return "-" if value is None or math.isnan(value) else f"{value:,.2f}"
+
+
+class IndustryComparisonTool:
+    class IndustryComparisonInput(BaseModel):
+        ticker: str
+
+    def compare(self, ticker: str) -> str:
+        comparison = compare_with_industry(ticker, peer_limit=PEER_LIMIT)
+        if comparison is None:
+            return f"No industry mapping for ticker {ticker}."
+
+        ticker, company = comparison["ticker"], comparison["company_indicators"]
+        lines = [
+            f"{ticker} ({comparison['name']}) - basic industry: {comparison['industry']}",
+            f"Peers, largest first ({comparison['peer_count']} in total): {', '.join(comparison['peers']) or 'none'}",
+        ]
+        if comparison["industry_indicators"]:
+            lines += ["", f"| indicator | {ticker} | industry |", "|---|---|---|"]
+            for indicator, industry_value in comparison["industry_indicators"].items():
+                value, year = company.get(indicator, (None, None))
+                company_cell = f"{_format_value(value)} (FY{year})" if year else "-"
+                lines.append(f"| {indicator} | {company_cell} | {_format_value(industry_value)} |")
+        else:
+            lines.append("No indicators are available for this industry.")
+        return "\n".join(lines)
+
+    async def acompare(self, ticker: str) -> str:
+        """Compare asynchronously; the first call builds the industry index from its CSVs."""
+        return await asyncio.to_thread(self.compare, ticker)
+
+    def get_tool(self):
+        """Method to create and return the StructuredTool"""
+        industry_comparison_tool = StructuredTool.from_function(
+            func=self.acompare,
+            name="industry_comparison",
+            description=(
+                "industry_comparison(ticker: str) -> str:\n"
+                " - Returns the basic industry of the ticker, its largest peers and a table of the company's "
+                "ratios (P/E, P/B, ROE, ROCE, margins, debt to equity, dividend yield) next to the industry's.\n"
+                " - Use it to compare a company with its industry or to find its competitors.\n"
+            ),
+            args_schema=self.IndustryComparisonInput,
+        )
+        return industry_comparison_tool
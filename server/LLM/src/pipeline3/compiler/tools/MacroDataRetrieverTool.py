@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from src.components.retrievers.IndexRegistry import get_index_registry, get_macro_store_path
+from ..base import StructuredTool
+
+# Chunks returned to the planner per retrieval.
+RETRIEVED_CHUNKS = 5
+
+
+class MacroDataRetrieverTool:
+    def __init__(self, data_loader, api_manager):
+        self.api_manager = api_manager
+        self.bm25_backend = data_loader.workflow_config.get("bm25Backend", {}).get("value", "local")
+
+    class MacroDataRetrieverInput(BaseModel):
+        query: str
+
+    async def retrieve(self, query: str) -> str:
+        """Search the macroeconomic reports with hybrid retrieval."""
+        try:
+            retriever = await get_index_registry().get(
+                get_macro_store_path(), self.api_manager, self.bm25_backend, user_id="macroData", ticker="data"
+            )
+        except ValueError:
+            return "No macroeconomic data is available."
+        if not retriever.vectordb.metadata:
+            return "No macroeconomic data is available."
+
+        results = await retriever.ainvoke(query, k=RETRIEVED_CHUNKS)
+        if not results:
+            return f"No macroeconomic data found for: {query}"
+        return "\n\n".join(result["chunk"]["content"] for result in results)
+
+    def get_tool(self):
+        """Method to create and return the StructuredTool"""
+        macro_data_retriever_tool = StructuredTool.from_function(
+            func=self.retrieve,
+            name="macro_data_retriever",
+            description=(
+                "macro_data_retriever(query: str) -> str:\n"
+                " - Retrieves passages from macroeconomic and industry research reports relevant to the query.\n"
+                " - Use it for economy-wide or sector-wide trends, not for a single company's data.\n"
+            ),
+            args_schema=self.MacroDataRetrieverInput,
+        )
+        return macro_data_retriever_tool
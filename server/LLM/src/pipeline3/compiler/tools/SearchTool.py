@@ -4,6 +4,12 @@ from pydantic import BaseModel
 from langchain_community.tools.tavily_search import TavilySearchResults
 from ..base import StructuredTool
 
+# Tavily calls in flight and started per second, across all plans of the process.
+MAX_CONCURRENCY = 4
+RATE_PER_SEC = 4
+# Seconds a Tavily search may take before the plan goes on without it.
+TIMEOUT = 20
+
 
 class SearchTool:
     def __init__(self, api_manager):
@@ -33,5 +39,8 @@ class SearchTool:
                 " - Always include the company name or ticker name into the entity so that search data retrived from web is accurate.\n"
             ),
             args_schema=self.SearchInput,
+            max_concurrency=MAX_CONCURRENCY,
+            rate_per_sec=RATE_PER_SEC,
+            timeout=TIMEOUT,
         )
         return search_tool
@@ -0,0 +1,86 @@
+import os
+from typing import List, Optional
+from pydantic import BaseModel
+from src.components.IndustryIndex import get_industry_index, normalize_ticker
+from src.components.retrievers.IndexRegistry import get_index_registry, get_ticker_store_path
+from ..base import StructuredTool
+
+# Chunks returned to the planner per retrieval.
+RETRIEVED_CHUNKS = 5
+
+
+class TickerDataRetrieverTool:
+    def __init__(self, data_loader, api_manager, ticker_name: str, other_mentioned_ticker_names: List[str]):
+        self.user_id = data_loader.user_id
+        self.api_manager = api_manager
+        self.bm25_backend = data_loader.workflow_config.get("bm25Backend", {}).get("value", "local")
+        self.tickers = [ticker for ticker in [ticker_name, *other_mentioned_ticker_names] if ticker]
+
+    class TickerDataRetrieverInput(BaseModel):
+        ticker: str
+        query: str
+
+    def _known_tickers(self) -> List[str]:
+        """The chat's tickers, then the tickers the user uploaded documents for."""
+        user_dir = os.path.dirname(os.path.dirname(get_ticker_store_path(self.user_id, "_")))
+        folders = sorted(os.listdir(user_dir)) if os.path.isdir(user_dir) else []
+        return [*self.tickers, *folders]
+
+    def _resolve_ticker(self, ticker: str) -> Optional[str]:
+        """
+        Match the planner's ticker against the known tickers, ignoring case and
+        punctuation; failing that, read it as a company name ("Tata Motors") and
+        match the tickers the industry mapping lists for it.
+        """
+        known = {}
+        for name in self._known_tickers():
+            known.setdefault(normalize_ticker(name), name)
+        resolved = known.get(normalize_ticker(ticker))
+        if resolved is not None:
+            return resolved
+        try:
+            candidates = get_industry_index().find_tickers(ticker)
+        except (OSError, ValueError) as e:
+            print(f"Could not read the ticker mapping: {e}")
+            return None
+        for candidate in candidates:
+            resolved = known.get(normalize_ticker(candidate))
+            if resolved is not None:
+                return resolved
+        return None
+
+    async def retrieve(self, ticker: str, query: str) -> str:
+        """Search the documents the user uploaded for `ticker` with hybrid retrieval."""
+        resolved = self._resolve_ticker(ticker)
+        if resolved is None:
+            return f"No documents uploaded for ticker {ticker}. Known tickers: {', '.join(self.tickers)}"
+        try:
+            retriever = await get_index_registry().get(
+                get_ticker_store_path(self.user_id, resolved), self.api_manager, self.bm25_backend, user_id=self.user_id, ticker=resolved
+            )
+        except ValueError:
+            return f"No documents uploaded for ticker {resolved}."
+        if not retriever.vectordb.metadata:
+            # Uploads whose files yielded no text leave an empty store
+            return f"No documents uploaded for ticker {resolved}."
+
+        results = await retriever.ainvoke(query, k=RETRIEVED_CHUNKS)
+        if not results:
+            return f"No data found for {resolved} on: {query}"
+        return "\n\n".join(result["chunk"]["content"] for result in results)
+
+    def get_tool(self):
+        """Method to create and return the StructuredTool"""
+        ticker_data_retriever_tool = StructuredTool.from_function(
+            func=self.retrieve,
+            name="ticker_data_retriever",
+            description=(
+                "ticker_data_retriever(ticker: str, query: str) -> str:\n"
+                " - Retrieves passages relevant to the query from the documents uploaded for the ticker.\n"
+                f" - ticker must be one of: {', '.join(self.tickers)}.\n"
+                " - A company name is accepted in place of its ticker.\n"
+                " - Use one call per ticker.\n"
+            ),
+            args_schema=self.TickerDataRetrieverInput,
+        )
+        return ticker_data_retriever_tool
@@ -4,6 +4,11 @@ from .GithubComposioTool import GithubComposioTool
 from .ComposioTool import ComposioTool
 from .ComposioAppAndActionFinderTool import ComposioActionFinderTool
 from .SearchTool import SearchTool
+from .MacroDataRetrieverTool import MacroDataRetrieverTool
+from .TickerDataRetrieverTool import TickerDataRetrieverTool
+from .FundamentalDataRetrieverTool import FundamentalDataRetrieverTool
+from .IndustryComparisonTool import IndustryComparisonTool
+from .GraphMakerTool import GraphMakerTool
 from .ComposioLinearActionFinderTool import ComposioLinearActionFinderTool
 from .ComposioGithubActionFinderTool import ComposioGithubActionFinderTool
 
@@ -34,7 +39,13 @@ ticker_name
     with open(config_path, "r") as config_file:
         workflow_config = json.load(config_file)
 
-    tools = []
+    tools = [
+        MacroDataRetrieverTool(data_loader, api_manager).get_tool(),
+        TickerDataRetrieverTool(data_loader, api_manager, ticker_name, other_mentioned_ticker_names).get_tool(),
+        FundamentalDataRetrieverTool().get_tool(),
+        IndustryComparisonTool().get_tool(),
+        GraphMakerTool().get_tool(),
+    ]
     if workflow_config.get("useWebSearchTool")["value"]:
         tools.append(SearchTool(api_manager).get_tool())
     # if workflow_config.get("useGithubComposioTool")["value"]:
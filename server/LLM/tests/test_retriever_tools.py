@@ -0,0 +1,22 @@
+import asyncio
+import importlib
+from src.components.retrievers.VectorDB import VectorStoreWriter
+from src.pipeline3.compiler.tools import TickerDataRetrieverTool
+
+# The tools package re-exports the class under the module's name
+ticker_tool = importlib.import_module("src.pipeline3.compiler.tools.TickerDataRetrieverTool")
+
+
+class FakeDataLoader:
+    user_id = "test-user"
+    workflow_config = {}
+
+
+def test_empty_ticker_store_reports_no_documents(tmp_path, monkeypatch):
+    # An upload whose files yielded no text commits a store without chunks
+    VectorStoreWriter(str(tmp_path / "AAPL" / "AAPL")).commit()
+    monkeypatch.setattr(ticker_tool, "get_ticker_store_path", lambda user_id, ticker: str(tmp_path / ticker / ticker))
+
+    tool = TickerDataRetrieverTool(FakeDataLoader(), None, "AAPL", [])
+    answer = asyncio.run(tool.retrieve("AAPL", "revenue growth"))
+    assert answer == "No documents uploaded for ticker AAPL."
@@ -0,0 +1,61 @@
+from src.pipeline3.compiler.output_parser import instantiate_task
+import pytest
+from src.pipeline3.compiler.tools import ComposioActionFinderTool, SearchTool
+from src.pipeline3.compiler.tools import ComposioAppAndActionFinderTool as action_finder
+from src.pipeline3.compiler.tools.SearchTool import MAX_CONCURRENCY, RATE_PER_SEC, TIMEOUT
+
+
+class FakeApiManager:
+    def get_key(self, name):
+        return "test-key"
+
+
+class FakeToolSet:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def get_apps(self):
+        if self.fail:
+            raise ConnectionError("Composio is unreachable")
+        return []
+
+
+def make_action_finder(fail=False):
+    # The constructor connects to Composio; only the tool set is needed to build the tool
+    finder = ComposioActionFinderTool.__new__(ComposioActionFinderTool)
+    finder.composio_tool_set = FakeToolSet(fail)
+    return finder.get_tool()
+
+
+def test_search_task_gets_the_tool_limiter():
+    tool = SearchTool(FakeApiManager()).get_tool()
+    assert tool.max_concurrency == MAX_CONCURRENCY
+    assert tool.rate_per_sec == RATE_PER_SEC
+
+    task = instantiate_task([tool], 1, "search", '"Tesla revenue"', "")
+    assert task.limiter is not None
+    assert task.limiter.max_concurrency == MAX_CONCURRENCY
+    assert task.limiter.rate_per_sec == RATE_PER_SEC
+
+
+def test_search_task_gets_the_tool_timeout():
+    tool = SearchTool(FakeApiManager()).get_tool()
+    task = instantiate_task([tool], 1, "search", '"Tesla revenue"', "")
+    assert task.timeout == TIMEOUT
+
+
+@pytest.mark.parametrize("fail", [False, True], ids=["tool", "fallback"])
+def test_action_finder_task_gets_the_tool_limiter(fail):
+    tool = make_action_finder(fail)
+    assert tool.name == "action_finder"
+
+    task = instantiate_task([tool], 1, "action_finder", '"send a message", "SLACK"', "")
+    assert task.limiter is not None
+    assert task.limiter.max_concurrency == action_finder.MAX_CONCURRENCY
+    assert task.limiter.rate_per_sec == action_finder.RATE_PER_SEC
+
+
+@pytest.mark.parametrize("fail", [False, True], ids=["tool", "fallback"])
+def test_action_finder_task_gets_the_tool_timeout(fail):
+    task = instantiate_task([make_action_finder(fail)], 1, "action_finder", '"send a message", "SLACK"', "")
+    assert task.timeout == action_finder.TIMEOUT